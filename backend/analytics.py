@@ -0,0 +1,109 @@
+import argparse
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from board import Board
+from game_engine import GameEngine
+from game_store import GameStore
+
+def _empty_model_stats() -> Dict[str, Any]:
+    return {
+        "games": 0,
+        "as_x": {"games": 0, "wins": 0, "losses": 0, "draws": 0},
+        "as_o": {"games": 0, "wins": 0, "losses": 0, "draws": 0},
+        "moves": 0,
+        "fallback_moves": 0,
+        "cached_moves": 0,
+        "attempts": 0,
+        "llm_time_ms": 0.0
+    }
+
+class GameAnalytics:
+    """Statistiques cumulées sur un flux de parties (une partie à la fois en mémoire)"""
+
+    def __init__(self):
+        self.games = 0
+        self.draws = 0
+        self.total_moves = 0
+        self.models: Dict[str, Dict[str, Any]] = {}
+
+    def add_game(self, game: Dict[str, Any]):
+        self.games += 1
+        winner = game.get("winner")
+        if winner is None:
+            self.draws += 1
+        self.total_moves += game.get("move_count", 0)
+
+        for color, key in (("X", "model_x"), ("O", "model_o")):
+            stats = self.models.setdefault(game.get(key) or "unknown", _empty_model_stats())
+            stats["games"] += 1
+            by_color = stats["as_x" if color == "X" else "as_o"]
+            by_color["games"] += 1
+            if winner is None:
+                by_color["draws"] += 1
+            elif winner == color:
+                by_color["wins"] += 1
+            else:
+                by_color["losses"] += 1
+
+        for move in game.get("moves") or []:
+            stats = self.models.setdefault(move.get("model") or "unknown", _empty_model_stats())
+            stats["moves"] += 1
+            stats["fallback_moves"] += bool(move.get("fallback"))
+            stats["cached_moves"] += bool(move.get("cached"))
+            stats["attempts"] += move.get("attempts") or 0
+            stats["llm_time_ms"] += move.get("latency_ms") or 0.0
+
+    def add_games(self, games: Iterable[Dict[str, Any]]) -> "GameAnalytics":
+        for game in games:
+            self.add_game(game)
+        return self
+
+    def report(self) -> Dict[str, Any]:
+        models = {}
+        for name, stats in self.models.items():
+            wins = stats["as_x"]["wins"] + stats["as_o"]["wins"]
+            models[name] = {
+                **stats,
+                "llm_time_ms": round(stats["llm_time_ms"], 2),
+                "win_rate": wins / stats["games"] if stats["games"] else 0.0,
+                "win_rate_as_x": stats["as_x"]["wins"] / stats["as_x"]["games"] if stats["as_x"]["games"] else 0.0,
+                "win_rate_as_o": stats["as_o"]["wins"] / stats["as_o"]["games"] if stats["as_o"]["games"] else 0.0,
+                "fallback_rate": stats["fallback_moves"] / stats["moves"] if stats["moves"] else 0.0,
+                "avg_latency_ms": round(stats["llm_time_ms"] / stats["moves"], 2) if stats["moves"] else 0.0,
+                "avg_attempts": stats["attempts"] / stats["moves"] if stats["moves"] else 0.0
+            }
+        return {
+            "games": self.games,
+            "draws": self.draws,
+            "avg_game_length": self.total_moves / self.games if self.games else 0.0,
+            "models": models
+        }
+
+def replay(game: Dict[str, Any], game_engine: GameEngine) -> Iterator[Tuple[Dict[str, Any], Board]]:
+    """Rejouer une partie journalisée coup par coup : (coup, plateau après le coup)"""
+    board = game_engine.new_board()
+    for move in game.get("moves") or []:
+        board = board.play(move["row"], move["col"], move["player"])
+        yield move, board
+
+def analyze_store(store: GameStore, model: Optional[str] = None) -> Dict[str, Any]:
+    """Parcourir tout le stockage en flux et produire le rapport"""
+    analytics = GameAnalytics()
+    for game in store.iter_games():
+        if model and model not in (game.get("model_x"), game.get("model_o")):
+            continue
+        analytics.add_game(game)
+    return analytics.report()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Statistiques des parties journalisées")
+    parser.add_argument("--log-dir", default="game_logs")
+    parser.add_argument("--model", help="Limiter aux parties d'un modèle")
+    args = parser.parse_args()
+
+    store = GameStore(f"{args.log_dir}/games.db")
+    try:
+        print(json.dumps(analyze_store(store, args.model), indent=2, ensure_ascii=False))
+    finally:
+        store.close()
@@ -1,49 +1,188 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import os
 import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set
 
 from game_engine import GameEngine
-from llm_client import LLMClient
-from azure_client import AzureClient
-from game_logger import GameLogger
+from llm_client import close_llm_client, get_llm_client
+from game_logger import GameLogger, build_move_record
+from model_registry import ModelRegistry
+from metrics import registry as metrics_registry, ENGINE_SECONDS, summarize_moves
+from analytics import analyze_store, replay
+from ratings import RatingService
+from events import EventBus
+from game_state import game_state_store_from_env
+from prompts import ENCODINGS, compare_encodings
+from tournament import Tournament, schedule, MODES
 
-app = FastAPI(title="Tic-Tac-Toe LLM")
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def _evict_expired_games():
+    """Retirer périodiquement les parties abandonnées (inactives depuis GAME_TTL)
+    et les tournois terminés depuis plus de TOURNAMENT_TTL"""
+    while True:
+        await asyncio.sleep(GAME_EVICT_INTERVAL)
+        for game_id in game_states.evict_expired():
+            task = auto_tasks.get(game_id)
+            if task:
+                task.cancel()
+            event_bus.publish(game_id, {"type": "error", "detail": "Partie expirée", "game_over": True})
+        _evict_finished_tournaments()
+
+def _evict_finished_tournaments(now: Optional[float] = None):
+    now = time.time() if now is None else now
+    for tournament_id, tournament in list(tournaments.items()):
+        if tournament_id in tournament_tasks or tournament.end_time is None:
+            continue
+        if now - tournament.end_time > TOURNAMENT_TTL:
+            del tournaments[tournament_id]
+
+def _rebuild_ratings() -> int:
+    """Recalcul complet du classement (parcours de toute la base, dans un thread)"""
+    return rating_service.rebuild(game_logger.store.iter_games())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model_registry.start()
+    evict_task = asyncio.create_task(_evict_expired_games())
+    warmup_task = asyncio.create_task(get_llm_client().warm_up()) if WARMUP_ON_STARTUP else None
+    if not await asyncio.to_thread(rating_service.leaderboard) and await asyncio.to_thread(game_logger.store.count):
+        # Premier démarrage avec un historique existant : un seul passage sur les parties
+        await asyncio.to_thread(_rebuild_ratings)
+    yield
+    evict_task.cancel()
+    if warmup_task:
+        warmup_task.cancel()
+    await model_registry.stop()
+    for task in list(tournament_tasks.values()) + list(auto_tasks.values()):
+        task.cancel()
+    await close_llm_client()
+    game_logger.close()
+    rating_service.close()
+    game_states.close()
+
+app = FastAPI(title="Tic-Tac-Toe LLM", lifespan=lifespan)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
 game_engine = GameEngine()
-llm_client = LLMClient()
-azure_client = AzureClient()
+# Le client LLM (connexions HTTP) est créé au premier usage, dans la boucle d'événements,
+# et fermé à l'arrêt ; le SDK Azure n'est chargé qu'au premier appel (ou par /api/warmup)
 game_logger = GameLogger()
+rating_service = RatingService(str(game_logger.log_dir / "ratings.db"))
+game_logger.add_listener(rating_service.update)
+model_registry = ModelRegistry(lambda: get_llm_client().fetch_models(), lambda: get_llm_client().fallback_models())
+event_bus = EventBus()
+
+# Parties en cours : en mémoire (un worker) ou SQLite (plusieurs workers), voir GAME_STATE_STORE
+game_states = game_state_store_from_env(game_logger.log_dir)
+GAME_EVICT_INTERVAL = float(os.getenv("GAME_EVICT_INTERVAL", "60"))
+# Durée pendant laquelle le résumé d'un tournoi terminé reste consultable
+TOURNAMENT_TTL = float(os.getenv("TOURNAMENT_TTL", "3600"))
+# Préchauffage en tâche de fond au démarrage : le serveur répond sans l'attendre
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "0") == "1"
+# Un seul coup en cours par partie dans ce worker : le LLM est attendu sans bloquer la boucle.
+# Entre workers, la version de la partie (game_states.update) détecte les coups concurrents.
+moves_in_progress: Set[str] = set()
+tournaments: Dict[str, Tournament] = {}
+tournament_tasks: Dict[str, asyncio.Task] = {}
+# Parties jouées automatiquement par le backend (mode auto)
+auto_tasks: Dict[str, asyncio.Task] = {}
+# File du flux multiplexé : assez grande pour un tour de tournoi complet
+ALL_GAMES_QUEUE_SIZE = 4096
+
+class StartGameRequest(BaseModel):
+    model_x: Optional[str] = None
+    model_o: Optional[str] = None
 
-active_games: Dict[str, Dict[str, Any]] = {}
 class MoveRequest(BaseModel):
     game_id: str
-    model_name: str
-    grid: list
-    current_player: str
+    model_name: Optional[str] = None
+
+class AutoPlayRequest(BaseModel):
+    enabled: bool = True
+    delay: float = 0.0
+    model_x: Optional[str] = None
+    model_o: Optional[str] = None
+
+class TournamentRequest(BaseModel):
+    models: Optional[List[str]] = None
+    mode: str = "round_robin"
+    games_per_pair: int = 1
+    ollama_concurrency: int = 16
+    azure_concurrency: int = 8
+    max_parallel_games: int = 16
+    use_move_cache: bool = True
+    prompt_encoding: Optional[str] = None
+    affinity: bool = True
 
 @app.get("/")
 async def root():
     return {"message": "Tic-Tac-Toe LLM", "status": "running"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métriques au format texte Prometheus"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/models")
 async def get_models():
-    all_models = llm_client.get_available_models()
+    all_models = await model_registry.get_models()
     return {"models": all_models}
 
+@app.get("/api/models/status")
+async def get_models_status():
+    return model_registry.status()
+
+@app.post("/api/models/invalidate")
+async def invalidate_models():
+    model_registry.invalidate()
+    return {"status": "refreshing"}
+
+@app.post("/api/warmup")
+async def warm_up():
+    """Charger le SDK Azure et ouvrir la connexion Ollama avant la première partie"""
+    return await get_llm_client().warm_up()
+
+@app.get("/api/ollama/stats")
+async def get_ollama_stats():
+    llm_client = get_llm_client()
+    return {**llm_client.http.stats(), "scheduler": llm_client.scheduler.stats()}
+
+@app.get("/api/game-state/stats")
+async def get_game_state_stats():
+    return {**game_states.stats(), "moves_in_progress": len(moves_in_progress)}
+
+@app.get("/api/move-cache/stats")
+async def get_move_cache_stats():
+    move_cache = get_llm_client().move_cache
+    if move_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **move_cache.stats()}
+
 @app.post("/api/game/start")
-async def start_game():
+async def start_game(request: Optional[StartGameRequest] = None):
+    request = request or StartGameRequest()
     game_state = game_engine.create_new_game()
 
-    active_games[game_state['game_id']] = {
+    game_states.create(game_state['game_id'], {
+        "board": game_state["board"],
+        "current_player": game_state["current_player"],
         "start_time": time.time(),
-        "model_x": None,
-        "model_o": None,
+        "model_x": request.model_x,
+        "model_o": request.model_o,
         "moves": []
-    }
+    })
+    event_bus.publish(game_state['game_id'], {
+        "type": "start", "model_x": request.model_x, "model_o": request.model_o, "current_player": game_state["current_player"]
+    })
 
     return {
         "grid": game_state["grid"],
@@ -53,58 +192,335 @@ async def start_game():
         "move_count": game_state["move_count"]
     }
 
+@app.get("/api/games/writer")
+async def get_log_writer_stats():
+    return game_logger.stats()
+
+@app.get("/api/games")
+async def get_games(limit: int = 10):
+    """Dernières parties terminées"""
+    return {"games": await asyncio.to_thread(game_logger.get_game_history, limit)}
+
+@app.get("/api/games/analytics")
+async def get_analytics(model: Optional[str] = None):
+    """Taux de victoire par couleur, longueur moyenne et taux de secours par modèle"""
+    # flush() attend le thread d'écriture : pas sur la boucle d'événements
+    await asyncio.to_thread(game_logger.flush)
+    return await asyncio.to_thread(analyze_store, game_logger.store, model)
+
+@app.get("/api/leaderboard")
+async def get_leaderboard():
+    """Classement Elo des modèles"""
+    return {"leaderboard": await asyncio.to_thread(rating_service.leaderboard)}
+
+@app.post("/api/leaderboard/rebuild")
+async def rebuild_leaderboard():
+    """Recalculer le classement depuis tout l'historique"""
+    await asyncio.to_thread(game_logger.flush)
+    games = await asyncio.to_thread(_rebuild_ratings)
+    return {"games": games, "leaderboard": await asyncio.to_thread(rating_service.leaderboard)}
+
+@app.get("/api/games/{game_id}/replay")
+async def replay_game(game_id: str):
+    """Rejouer une partie terminée et vérifier son résultat"""
+    game = await asyncio.to_thread(game_logger.store.get, game_id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Partie inconnue")
+    if not game.get("moves"):
+        raise HTTPException(status_code=422, detail="Partie journalisée sans historique des coups")
+
+    winner = None
+    board = game_engine.new_board()
+    for move, board in replay(game, game_engine):
+        if board.has_won(move["player"]):
+            winner = move["player"]
+    return {
+        "game_id": game_id,
+        "moves": game["moves"],
+        "final_grid": board.to_grid(),
+        "winner": winner,
+        "consistent": winner == game.get("winner")
+    }
+
+@app.get("/api/game/{game_id}/prompt-size")
+async def get_prompt_size(game_id: str):
+    """Taille estimée des prompts de la position courante pour chaque encodage"""
+    game = game_states.get(game_id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Partie inconnue ou terminée")
+    return compare_encodings(game["board"].to_grid(), game["current_player"])
+
+@app.get("/api/game/{game_id}")
+async def get_game(game_id: str):
+    """État complet d'une partie en cours (resynchronisation du client)"""
+    game = game_states.get(game_id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Partie inconnue ou terminée")
+
+    board = game["board"]
+    return {
+        "grid": board.to_grid(),
+        "current_player": game["current_player"],
+        "game_id": game_id,
+        "winner": None,
+        "move_count": board.move_count,
+        "model_x": game["model_x"],
+        "model_o": game["model_o"]
+    }
+
 @app.post("/api/game/move")
 async def make_move(request: MoveRequest):
-    if game_engine.check_winner(request.grid, "X") or game_engine.check_winner(request.grid, "O"):
-        return {"grid": request.grid, "winner": request.current_player, "current_player": request.current_player, "move": {}}
-    
-    move_result = llm_client.ask_move(request.grid, request.current_player, request.model_name)
+    game = game_states.get(request.game_id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Partie inconnue ou terminée")
+
+    if request.game_id in moves_in_progress:
+        raise HTTPException(status_code=409, detail="Un coup est déjà en cours pour cette partie")
+
+    moves_in_progress.add(request.game_id)
+    try:
+        return await _play_turn(request.game_id, game, request.model_name)
+    finally:
+        moves_in_progress.discard(request.game_id)
+
+async def _play_turn(game_id: str, game: Dict[str, Any], requested_model: Optional[str]) -> Dict[str, Any]:
+    player = game["current_player"]
+    model_key = "model_x" if player == "X" else "model_o"
+    # Le client peut changer de modèle en cours de partie
+    if requested_model:
+        game[model_key] = requested_model
+    model_name = game[model_key]
+    if not model_name:
+        raise HTTPException(status_code=400, detail=f"Aucun modèle défini pour le joueur {player}")
+
+    board = game["board"]
+    move_result = await get_llm_client().ask_move(board.to_grid(), player, model_name)
     
     if not move_result.get("valid", False):
         raise HTTPException(status_code=400, detail="Coup invalide")
     
-    new_grid = game_engine.make_move(request.grid, move_result['row'], move_result['col'], request.current_player)
-    winner = request.current_player if game_engine.check_winner(new_grid, request.current_player) else None
-
-    # Mettre à jour les infos de jeu pour les logs
-    if request.game_id in active_games:
-        # Enregistrer le modèle utilisé pour ce joueur
-        if request.current_player == "X":
-            active_games[request.game_id]["model_x"] = request.model_name
-        else:
-            active_games[request.game_id]["model_o"] = request.model_name
-        
-        active_games[request.game_id]["moves"].append({
-            "player": request.current_player,
-            "row": move_result['row'],
-            "col": move_result['col'],
-            "model": request.model_name
-        })
-    
-    game_over = winner is not None or game_engine.is_grid_full(new_grid)
+    with ENGINE_SECONDS.time(operation="play"):
+        board = board.play(move_result['row'], move_result['col'], player)
+        winner = player if board.has_won(player) else None
+        game_over = winner is not None or board.is_full()
 
-    if game_over and request.game_id in active_games:
+    # Mettre à jour l'état de la partie (refusé si un autre worker a joué entre-temps)
+    game["board"] = board
+    game["current_player"] = "O" if player == "X" else "X"
+    game["moves"] = game["moves"] + [build_move_record(player, model_name, move_result)]
+    if not game_states.update(game_id, game):
+        raise HTTPException(status_code=409, detail="La partie a été modifiée par une autre requête")
+
+    if game_over:
         game_data = {
-            "game_id": request.game_id,
+            "game_id": game_id,
             "winner": winner,
-            "start_time": active_games[request.game_id]['start_time'],
+            "start_time": game['start_time'],
             "end_time": time.time(),
-            "duration_seconds": time.time() - active_games[request.game_id]['start_time'],
-            "model_x": active_games[request.game_id]['model_x'],
-            "model_o": active_games[request.game_id]['model_o'],
-            "move_count": len(active_games[request.game_id]['moves']),
-            "final_grid": new_grid
+            "duration_seconds": time.time() - game['start_time'],
+            "model_x": game['model_x'],
+            "model_o": game['model_o'],
+            "move_count": len(game['moves']),
+            "final_grid": board.to_grid(),
+            "moves": game['moves'],
+            "metrics": summarize_moves(game['moves'])
         }
 
         # Journaliser la partie
         game_logger.log_game(game_data)
 
         # Supprimer le jeu des jeux actifs
-        del active_games[request.game_id]
+        game_states.delete(game_id)
     
-    return {
-        "grid": new_grid,
+    result = {
+        "move": {"row": move_result['row'], "col": move_result['col'], "player": player},
         "winner": winner,
-        "current_player": "O" if request.current_player == "X" else "X",
-        "move": {"row": move_result['row'], "col": move_result['col'], "player": request.current_player}
-    }
\ No newline at end of file
+        "current_player": game["current_player"],
+        "move_count": board.move_count,
+        "game_over": game_over
+    }
+    # Modèles effectivement utilisés : ceux de la partie peuvent n'être fixés qu'au premier coup
+    event_bus.publish(game_id, {"type": "move", **result, "model_x": game["model_x"], "model_o": game["model_o"]})
+    return result
+
+@app.post("/api/game/{game_id}/auto")
+async def set_auto_play(game_id: str, request: AutoPlayRequest):
+    """Démarrer ou arrêter le jeu automatique piloté par le backend"""
+    game = game_states.get(game_id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Partie inconnue ou terminée")
+
+    if request.model_x or request.model_o:
+        game["model_x"] = request.model_x or game["model_x"]
+        game["model_o"] = request.model_o or game["model_o"]
+        if not game_states.update(game_id, game):
+            raise HTTPException(status_code=409, detail="La partie a été modifiée par une autre requête")
+
+    task = auto_tasks.get(game_id)
+    if request.enabled and (task is None or task.done()):
+        auto_tasks[game_id] = asyncio.create_task(_auto_play(game_id, request.delay))
+    elif not request.enabled and task:
+        task.cancel()
+    event_bus.publish(game_id, {"type": "auto", "enabled": request.enabled})
+    return {"game_id": game_id, "auto": request.enabled}
+
+async def _auto_play(game_id: str, delay: float):
+    """Enchaîner les coups jusqu'à la fin de la partie ; chaque coup part dès que le précédent est joué"""
+    try:
+        while True:
+            game = game_states.get(game_id)
+            if game is None:
+                break
+            if game_id in moves_in_progress:
+                # Coup manuel en cours : attendre qu'il soit joué
+                await asyncio.sleep(0.05)
+                continue
+            moves_in_progress.add(game_id)
+            try:
+                result = await _play_turn(game_id, game, None)
+            except HTTPException as e:
+                if e.status_code != 409:
+                    raise
+                continue
+            finally:
+                moves_in_progress.discard(game_id)
+            if result["game_over"]:
+                break
+            if delay:
+                await asyncio.sleep(delay)
+    except HTTPException as e:
+        event_bus.publish(game_id, {"type": "error", "detail": e.detail})
+    except Exception as e:
+        # Sans cela la tâche s'arrête en silence et la partie reste en mode auto
+        logger.exception(f"Mode auto interrompu pour la partie {game_id}: {e}")
+        event_bus.publish(game_id, {"type": "error", "detail": "Mode auto interrompu : erreur interne"})
+    finally:
+        if auto_tasks.get(game_id) is asyncio.current_task():
+            del auto_tasks[game_id]
+
+async def _stream_events(websocket: WebSocket, queue: asyncio.Queue, until_game_over: bool, batch: bool = False):
+    """Relayer les événements de la file vers le WebSocket jusqu'à déconnexion du client
+
+    En mode batch, tous les événements déjà en file partent dans un seul message
+    {"type": "batch", "events": [...]} : un message par réveil au lieu d'un par coup.
+    """
+    receiver = asyncio.create_task(websocket.receive_text())
+    try:
+        while True:
+            getter = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                getter.cancel()
+                if receiver.exception() is not None:
+                    return
+                # Message du client ignoré : on continue d'écouter
+                receiver = asyncio.create_task(websocket.receive_text())
+                continue
+            event = getter.result()
+            if batch:
+                events = [event]
+                while not queue.empty():
+                    events.append(queue.get_nowait())
+                await websocket.send_json({"type": "batch", "events": events})
+                continue
+            await websocket.send_json(event)
+            if until_game_over and event.get("game_over"):
+                return
+    finally:
+        receiver.cancel()
+
+@app.websocket("/ws/game/{game_id}")
+async def game_events(websocket: WebSocket, game_id: str):
+    """Flux des événements d'une partie : état initial puis chaque coup"""
+    await websocket.accept()
+    # S'abonner avant l'instantané pour ne perdre aucun coup
+    queue = event_bus.subscribe(game_id)
+    try:
+        game = game_states.get(game_id)
+        if game is None:
+            await websocket.send_json({"type": "error", "game_id": game_id, "detail": "Partie inconnue ou terminée", "game_over": True})
+            return
+        await websocket.send_json({
+            "type": "state",
+            "game_id": game_id,
+            "grid": game["board"].to_grid(),
+            "current_player": game["current_player"],
+            "move_count": game["board"].move_count,
+            "auto": game_id in auto_tasks
+        })
+        await _stream_events(websocket, queue, until_game_over=True)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_bus.unsubscribe(queue, game_id)
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass
+
+def _live_games() -> List[Dict[str, Any]]:
+    """Instantané de toutes les parties en cours (interactives et tournois)"""
+    games = [(game_id, game, None) for game_id, game in game_states.items()]
+    for tournament_id, tournament in tournaments.items():
+        games += [(game_id, game, tournament_id) for game_id, game in list(tournament.live.items())]
+    return [{
+        "type": "state",
+        "game_id": game_id,
+        "tournament_id": tournament_id,
+        "grid": game["board"].to_grid(),
+        "current_player": game["current_player"],
+        "move_count": game["board"].move_count,
+        "model_x": game["model_x"],
+        "model_o": game["model_o"]
+    } for game_id, game, tournament_id in games]
+
+@app.websocket("/ws/games")
+async def all_games_events(websocket: WebSocket):
+    """Flux multiplexé de toutes les parties : instantané puis événements groupés"""
+    await websocket.accept()
+    queue = event_bus.subscribe(None, max_queue=ALL_GAMES_QUEUE_SIZE)
+    try:
+        await websocket.send_json({"type": "batch", "events": _live_games()})
+        await _stream_events(websocket, queue, until_game_over=False, batch=True)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_bus.unsubscribe(queue, None)
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass
+
+@app.post("/api/tournament/start")
+async def start_tournament(request: TournamentRequest):
+    models = request.models or await model_registry.get_models()
+    if len(models) < 2:
+        raise HTTPException(status_code=400, detail="Il faut au moins deux modèles pour un tournoi")
+    if request.mode not in MODES:
+        raise HTTPException(status_code=400, detail=f"Mode inconnu: {request.mode}")
+    if request.prompt_encoding and request.prompt_encoding not in ENCODINGS:
+        raise HTTPException(status_code=400, detail=f"Encodage inconnu: {request.prompt_encoding}")
+
+    tournament = Tournament(
+        get_llm_client(), game_engine, game_logger,
+        concurrency={"ollama": request.ollama_concurrency, "azure": request.azure_concurrency},
+        max_parallel_games=request.max_parallel_games,
+        use_move_cache=request.use_move_cache,
+        prompt_encoding=request.prompt_encoding,
+        affinity=request.affinity,
+        on_event=event_bus.publish
+    )
+    matchups = schedule(models, request.games_per_pair, request.mode)
+    tournaments[tournament.tournament_id] = tournament
+    task = asyncio.create_task(tournament.run(matchups))
+    tournament_tasks[tournament.tournament_id] = task
+    task.add_done_callback(lambda _: tournament_tasks.pop(tournament.tournament_id, None))
+
+    return {"tournament_id": tournament.tournament_id, "models": models, "total": len(matchups)}
+
+@app.get("/api/tournament/{tournament_id}")
+async def get_tournament(tournament_id: str):
+    tournament = tournaments.get(tournament_id)
+    if tournament is None:
+        raise HTTPException(status_code=404, detail="Tournoi inconnu")
+    return tournament.summary()
@@ -0,0 +1,125 @@
+from typing import Dict, List, Tuple
+
+EMPTY = " "
+PLAYERS = ("X", "O")
+
+
+class Board:
+    """Plateau compact : un masque de bits par joueur
+
+    La case (row, col) correspond au bit row * stride + col, avec
+    stride = grid_size + 1. La colonne supplémentaire reste toujours à zéro
+    et empêche les décalages horizontaux et diagonaux de déborder d'une ligne
+    sur la suivante.
+    """
+
+    __slots__ = ("grid_size", "win_length", "x", "o", "_stride", "_shifts")
+
+    def __init__(self, grid_size: int = 10, win_length: int = 5, x: int = 0, o: int = 0):
+        self.grid_size = grid_size
+        self.win_length = win_length
+        self.x = x
+        self.o = o
+        self._stride = grid_size + 1
+        # Horizontal, vertical, diagonale, anti-diagonale
+        self._shifts = (1, self._stride, self._stride + 1, self._stride - 1)
+
+    @classmethod
+    def from_grid(cls, grid: List[List[str]], win_length: int = 5) -> "Board":
+        """Construire un plateau depuis le format liste de chaînes"""
+        grid_size = len(grid)
+        stride = grid_size + 1
+        x = o = 0
+        for r, row in enumerate(grid):
+            if len(row) != grid_size:
+                raise ValueError(f"Grille non carrée: ligne {r} de longueur {len(row)}")
+            for c, cell in enumerate(row):
+                if cell == "X":
+                    x |= 1 << (r * stride + c)
+                elif cell == "O":
+                    o |= 1 << (r * stride + c)
+                elif cell != EMPTY:
+                    raise ValueError(f"Case invalide en ({r}, {c}): {cell!r}")
+        return cls(grid_size, win_length, x, o)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, int]) -> "Board":
+        return cls(data["grid_size"], data["win_length"], data["x"], data["o"])
+
+    def to_dict(self) -> Dict[str, int]:
+        """Forme sérialisable (JSON) : les deux masques de bits et les dimensions"""
+        return {"grid_size": self.grid_size, "win_length": self.win_length, "x": self.x, "o": self.o}
+
+    def to_grid(self) -> List[List[str]]:
+        """Convertir vers le format liste de chaînes utilisé par l'API"""
+        return [[self.cell(r, c) for c in range(self.grid_size)] for r in range(self.grid_size)]
+
+    def _bit(self, row: int, col: int) -> int:
+        if not (0 <= row < self.grid_size and 0 <= col < self.grid_size):
+            raise ValueError(f"Case hors grille: ({row}, {col})")
+        return 1 << (row * self._stride + col)
+
+    def cell(self, row: int, col: int) -> str:
+        bit = self._bit(row, col)
+        if self.x & bit:
+            return "X"
+        if self.o & bit:
+            return "O"
+        return EMPTY
+
+    def is_empty(self, row: int, col: int) -> bool:
+        return not (self.x | self.o) & self._bit(row, col)
+
+    def play(self, row: int, col: int, player: str) -> "Board":
+        """Retourner un nouveau plateau avec le coup joué (le plateau courant est inchangé)"""
+        bit = self._bit(row, col)
+        if (self.x | self.o) & bit:
+            raise ValueError(f"Case déjà occupée: ({row}, {col})")
+        if player == "X":
+            return Board(self.grid_size, self.win_length, self.x | bit, self.o)
+        if player == "O":
+            return Board(self.grid_size, self.win_length, self.x, self.o | bit)
+        raise ValueError(f"Joueur invalide: {player!r}")
+
+    def has_won(self, player: str) -> bool:
+        """Détecter un alignement de win_length pions par décalages et masques"""
+        mask = self.x if player == "X" else self.o
+        if mask.bit_count() < self.win_length:
+            return False
+        for shift in self._shifts:
+            run = mask
+            for step in range(1, self.win_length):
+                run &= mask >> (shift * step)
+                if not run:
+                    break
+            if run:
+                return True
+        return False
+
+    @property
+    def move_count(self) -> int:
+        return (self.x | self.o).bit_count()
+
+    def is_full(self) -> bool:
+        return self.move_count == self.grid_size * self.grid_size
+
+    def empty_cells(self) -> List[Tuple[int, int]]:
+        occupied = self.x | self.o
+        stride = self._stride
+        return [
+            (r, c)
+            for r in range(self.grid_size)
+            for c in range(self.grid_size)
+            if not occupied >> (r * stride + c) & 1
+        ]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Board):
+            return NotImplemented
+        return (self.grid_size, self.win_length, self.x, self.o) == (other.grid_size, other.win_length, other.x, other.o)
+
+    def __hash__(self) -> int:
+        return hash((self.grid_size, self.win_length, self.x, self.o))
+
+    def __repr__(self) -> str:
+        return f"Board(grid_size={self.grid_size}, win_length={self.win_length}, moves={self.move_count})"
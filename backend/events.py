@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Dict, Optional, Set
+
+class EventBus:
+    """Diffusion des événements de partie aux abonnés WebSocket
+
+    Un abonné suit une partie (game_id) ou toutes les parties (game_id=None).
+    Chaque abonné a sa propre file bornée : un client lent perd ses plus
+    vieux événements au lieu de ralentir les parties.
+    """
+
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        self._subscribers: Dict[Optional[str], Set[asyncio.Queue]] = {}
+        self.dropped = 0
+
+    def subscribe(self, game_id: Optional[str] = None, max_queue: Optional[int] = None) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue or self.max_queue)
+        self._subscribers.setdefault(game_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, game_id: Optional[str] = None):
+        subscribers = self._subscribers.get(game_id)
+        if subscribers:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[game_id]
+
+    def publish(self, game_id: str, event: Dict[str, Any]):
+        event = {"game_id": game_id, **event}
+        for key in (game_id, None):
+            for queue in self._subscribers.get(key, ()):
+                if queue.full():
+                    queue.get_nowait()
+                    self.dropped += 1
+                queue.put_nowait(event)
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
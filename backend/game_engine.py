@@ -1,16 +1,29 @@
 import uuid
 from typing import List
 
+from board import Board
+
 class GameEngine:
-    def __init__(self):
-        self.grid_size = 10
-        self.win_length = 5
+    def __init__(self, grid_size: int = 10, win_length: int = 5):
+        self.grid_size = grid_size
+        self.win_length = win_length
+
+    def new_board(self) -> Board:
+        """Créer un plateau vide"""
+        return Board(self.grid_size, self.win_length)
+
+    def to_board(self, grid: List[List[str]]) -> Board:
+        """Convertir une grille au format API en plateau compact"""
+        if len(grid) != self.grid_size:
+            raise ValueError(f"Grille de taille {len(grid)} au lieu de {self.grid_size}")
+        return Board.from_grid(grid, self.win_length)
 
     def create_new_game(self) -> dict:
         """Créer une nouvelle partie"""
-        grid = [[" " for _ in range(self.grid_size)] for _ in range(self.grid_size)]
+        board = self.new_board()
         return {
-            "grid": grid,
+            "board": board,
+            "grid": board.to_grid(),
             "current_player": "X",
             "game_id": str(uuid.uuid4()),
             "winner": None,
@@ -24,7 +37,7 @@ class GameEngine:
         return new_grid
     
     def check_winner(self, grid: List[List[str]], player: str) -> bool:
-        """Vérifier si un joueur a gagné"""
+        """Vérifier si un joueur a gagné (parcours complet de la grille)"""
         directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
 
         for row in range(self.grid_size):
@@ -1,29 +1,76 @@
-import json
 import csv
-import os
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any
 from pathlib import Path
 
+from game_store import GameStore
+from log_writer import BackgroundLogWriter
+from metrics import LOGGER_SECONDS
+
+def build_move_record(player: str, model: str, move_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Enregistrement complet d'un coup pour le journal de la partie"""
+    return {
+        "player": player,
+        "row": move_result['row'],
+        "col": move_result['col'],
+        "model": model,
+        "latency_ms": move_result.get("latency_ms"),
+        "attempts": move_result.get("attempts"),
+        "tokens": move_result.get("tokens"),
+        "prompt_encoding": move_result.get("prompt_encoding"),
+        "raw_response": move_result.get("raw_response"),
+        "fallback": bool(move_result.get("fallback")),
+        "cached": bool(move_result.get("cached")),
+        "timestamp": datetime.now().isoformat()
+    }
+
 class GameLogger:
-    def __init__(self, log_dir: str = "game_logs"):
+    def __init__(self, log_dir: str = "game_logs", background: bool = True):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
 
+        db_file = self.log_dir / "games.db"
+        is_new_store = not db_file.exists()
+        self.store = GameStore(str(db_file))
+        if is_new_store:
+            # Reprendre les anciens journaux (un fichier JSON par partie)
+            imported = self.store.import_json_files(self.log_dir)
+            if imported:
+                print(f"{imported} parties importées depuis les fichiers JSON")
+
+        # Abonnés notifiés après l'écriture de chaque lot (classement, etc.)
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+        # Les écritures disque se font hors du chemin de la requête
+        self.writer = BackgroundLogWriter(self._write_games) if background else None
+
     def log_game(self, game_data: Dict[str, Any]):
-        """Journaliser une partie complète"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        game_id = game_data.get("game_id", "unknown")
+        """Journaliser une partie complète (écriture asynchrone si background=True)"""
+        with LOGGER_SECONDS.time(operation="log_game"):
+            if self.writer:
+                self.writer.submit(game_data)
+            else:
+                self._write_games([game_data])
 
-        # Log JSON
-        json_file = self.log_dir / f"game_{timestamp}_{game_id}.json"
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(game_data, f, indent=2, ensure_ascii=False)
+    def _write_games(self, games: List[Dict[str, Any]]):
+        """Écrire un lot de parties dans le stockage et le CSV"""
+        with LOGGER_SECONDS.time(operation="write_batch"):
+            self.store.append_many(games)
 
-        # Log CSV pour stats
-        self._update_stats_csv(game_data)
+            # Log CSV pour stats
+            self._update_stats_csv(games)
 
-    def _update_stats_csv(self, game_data: Dict[str, Any]):
+        for listener in self._listeners:
+            try:
+                listener(games)
+            except Exception as e:
+                print(f"Erreur abonné journal {listener}: {e}")
+
+    def add_listener(self, listener: Callable[[List[Dict[str, Any]]], None]):
+        """Appeler listener(lot_de_parties) après chaque écriture"""
+        self._listeners.append(listener)
+
+    def _update_stats_csv(self, games: List[Dict[str, Any]]):
         """Mettre à jour le fichier de statistique CSV"""
         csv_file = self.log_dir / "game_stats.csv"
 
@@ -31,7 +78,7 @@ class GameLogger:
             "timestamp", "game_id", "winner", "move_count", "model_x", "model_o", "duration_seconds"
         ]
 
-        row = {
+        rows = [{
             "timestamp": datetime.now().isoformat(),
             "game_id": game_data.get("game_id", ""),
             "winner": game_data.get("winner", "draw"),
@@ -39,7 +86,7 @@ class GameLogger:
             "model_x": game_data.get("model_x", "unknown"),
             "model_o": game_data.get("model_o", "unknown"),
             "duration_seconds": game_data.get("duration_seconds", 0)
-        }
+        } for game_data in games]
 
         file_exists = csv_file.exists()
 
@@ -47,18 +94,23 @@ class GameLogger:
             writer = csv.DictWriter(f, fieldnames=headers)
             if not file_exists:
                 writer.writeheader()
-            writer.writerow(row)
+            writer.writerows(rows)
 
     def get_game_history(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Récupérer l'historique des parties"""
-        games = []
-        json_files = sorted(self.log_dir.glob("game_*.json"), reverse=True)
+        """Récupérer l'historique des parties (les parties encore en file n'y figurent pas)"""
+        return self.store.recent(limit)
 
-        for file_path in json_files[:limit]:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    game_data = json.load(f)
-                    games.append(game_data)
-            except Exception as e:
-                print(f"Erreur lecture {file_path}: {e}")
-        return games
\ No newline at end of file
+    def flush(self):
+        """Attendre que les parties en file soient écrites et validées"""
+        if self.writer:
+            self.writer.flush()
+        self.store.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.writer.stats() if self.writer else {}
+
+    def close(self):
+        """Écrire les parties en file, valider et fermer le stockage"""
+        if self.writer:
+            self.writer.close()
+        self.store.close()
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from board import Board
+
+class GameStateStore(ABC):
+    """État des parties en cours, avec expiration des parties abandonnées
+
+    Chaque partie porte un numéro de version : update() n'écrit que si la
+    version lue n'a pas changé entre-temps (écriture optimiste, sans verrou),
+    ce qui protège une partie jouée depuis plusieurs workers à la fois.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_games: int = 10000):
+        self.ttl = ttl
+        self.max_games = max_games
+
+    @abstractmethod
+    def create(self, game_id: str, game: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def update(self, game_id: str, game: Dict[str, Any]) -> bool:
+        """Enregistrer la partie si sa version est toujours la dernière ; False sinon"""
+        ...
+
+    @abstractmethod
+    def delete(self, game_id: str):
+        ...
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        ...
+
+    @abstractmethod
+    def evict_expired(self) -> List[str]:
+        """Supprimer les parties inactives depuis plus de ttl secondes ; retourne leurs identifiants"""
+        ...
+
+    def __contains__(self, game_id: str) -> bool:
+        return self.get(game_id) is not None
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "games": len(self), "ttl": self.ttl, "max_games": self.max_games}
+
+    def close(self):
+        pass
+
+class MemoryGameStore(GameStateStore):
+    """Parties en mémoire du processus (un seul worker), expiration TTL et LRU"""
+
+    def __init__(self, ttl: float = 3600.0, max_games: int = 10000):
+        super().__init__(ttl, max_games)
+        # game_id -> (partie, dernier accès) ; ordre = du moins au plus récemment utilisé
+        self._games: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.evicted = 0
+
+    def create(self, game_id: str, game: Dict[str, Any]):
+        game["version"] = 0
+        self._games[game_id] = (dict(game), time.monotonic())
+        while len(self._games) > self.max_games:
+            self._games.popitem(last=False)
+            self.evicted += 1
+
+    def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._games.get(game_id)
+        if entry is None:
+            return None
+        self._games[game_id] = (entry[0], time.monotonic())
+        self._games.move_to_end(game_id)
+        # Copie : les modifications de l'appelant ne comptent qu'après update()
+        return dict(entry[0])
+
+    def update(self, game_id: str, game: Dict[str, Any]) -> bool:
+        entry = self._games.get(game_id)
+        if entry is None or entry[0]["version"] != game["version"]:
+            return False
+        game["version"] += 1
+        self._games[game_id] = (dict(game), time.monotonic())
+        self._games.move_to_end(game_id)
+        return True
+
+    def delete(self, game_id: str):
+        self._games.pop(game_id, None)
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return ((game_id, dict(entry[0])) for game_id, entry in list(self._games.items()))
+
+    def evict_expired(self) -> List[str]:
+        limit = time.monotonic() - self.ttl
+        expired = []
+        # Les entrées sont triées par dernier accès : on s'arrête à la première récente
+        for game_id, (_, last_access) in self._games.items():
+            if last_access > limit:
+                break
+            expired.append(game_id)
+        for game_id in expired:
+            del self._games[game_id]
+        self.evicted += len(expired)
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "evicted": self.evicted}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS active_games (
+    game_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_active_games_updated_at ON active_games(updated_at);
+"""
+
+class SQLiteGameStore(GameStateStore):
+    """Parties partagées entre workers via un fichier SQLite (WAL)
+
+    Chaque lecture relit la base : un coup joué par un autre worker est vu
+    immédiatement. La partie est stockée en JSON, plateau compris (Board.to_dict).
+    """
+
+    def __init__(self, path: str, ttl: float = 3600.0, max_games: int = 10000):
+        super().__init__(ttl, max_games)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.evicted = 0
+
+    @staticmethod
+    def _dumps(game: Dict[str, Any]) -> str:
+        return json.dumps({**game, "board": game["board"].to_dict()}, ensure_ascii=False)
+
+    @staticmethod
+    def _loads(data: str, version: int) -> Dict[str, Any]:
+        game = json.loads(data)
+        game["board"] = Board.from_dict(game["board"])
+        game["version"] = version
+        return game
+
+    def create(self, game_id: str, game: Dict[str, Any]):
+        game["version"] = 0
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO active_games (game_id, version, updated_at, data) VALUES (?, 0, ?, ?)",
+                (game_id, time.time(), self._dumps(game))
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM active_games").fetchone()[0]
+            if count > self.max_games:
+                # Au-delà de la capacité : retirer les parties les moins récemment jouées
+                cursor = self._conn.execute(
+                    "DELETE FROM active_games WHERE game_id IN "
+                    "(SELECT game_id FROM active_games ORDER BY updated_at LIMIT ?)",
+                    (count - self.max_games,)
+                )
+                self.evicted += cursor.rowcount
+
+    def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data, version FROM active_games WHERE game_id = ?", (game_id,)).fetchone()
+        return self._loads(*row) if row else None
+
+    def update(self, game_id: str, game: Dict[str, Any]) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE active_games SET data = ?, version = version + 1, updated_at = ? WHERE game_id = ? AND version = ?",
+                (self._dumps(game), time.time(), game_id, game["version"])
+            )
+        if cursor.rowcount != 1:
+            return False
+        game["version"] += 1
+        return True
+
+    def delete(self, game_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM active_games WHERE game_id = ?", (game_id,))
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT game_id, data, version FROM active_games").fetchall()
+        return ((game_id, self._loads(data, version)) for game_id, data, version in rows)
+
+    def evict_expired(self) -> List[str]:
+        limit = time.time() - self.ttl
+        with self._lock:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT game_id FROM active_games WHERE updated_at < ?", (limit,)
+            )]
+            self._conn.execute("DELETE FROM active_games WHERE updated_at < ?", (limit,))
+        self.evicted += len(expired)
+        return expired
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM active_games").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "evicted": self.evicted, "path": str(self.path)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def game_state_store_from_env(log_dir: Path) -> GameStateStore:
+    """GAME_STATE_STORE=memory (défaut, un seul worker) ou sqlite (plusieurs workers)"""
+    ttl = float(os.getenv("GAME_TTL", "3600"))
+    max_games = int(os.getenv("GAME_STATE_MAX", "10000"))
+    if os.getenv("GAME_STATE_STORE", "memory") == "sqlite":
+        path = os.getenv("GAME_STATE_PATH", str(log_dir / "active_games.db"))
+        return SQLiteGameStore(path, ttl, max_games)
+    return MemoryGameStore(ttl, max_games)
@@ -0,0 +1,138 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_id TEXT NOT NULL UNIQUE,
+    timestamp TEXT NOT NULL,
+    model_x TEXT,
+    model_o TEXT,
+    winner TEXT,
+    move_count INTEGER,
+    duration_seconds REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_games_timestamp ON games (timestamp);
+CREATE INDEX IF NOT EXISTS idx_games_model_x ON games (model_x);
+CREATE INDEX IF NOT EXISTS idx_games_model_o ON games (model_o);
+"""
+
+class GameStore:
+    """Stockage append-only des parties dans une base SQLite en mode WAL
+
+    Chaque appel à append_many() est une transaction, validée aussitôt : le
+    verrou d'écriture n'est jamais gardé entre deux lots, et une autre
+    connexion (autre worker) peut écrire. Avec synchronous=NORMAL, SQLite ne
+    synchronise le disque qu'aux checkpoints du WAL et non à chaque lot.
+    """
+
+    def __init__(self, path: str, batch_size: int = 50, busy_timeout: float = 5.0):
+        self.path = Path(path)
+        # Taille des lots de l'import des anciens journaux JSON
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        # timeout : attente du verrou tenu par une autre connexion avant "database is locked"
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=busy_timeout)
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def append(self, game_data: Dict[str, Any], timestamp: Optional[str] = None):
+        """Ajouter une partie (une transaction ; préférer append_many pour plusieurs parties)"""
+        self.append_many([game_data], timestamp)
+
+    def append_many(self, games: List[Dict[str, Any]], timestamp: Optional[str] = None):
+        """Ajouter un lot de parties en une seule transaction validée"""
+        timestamp = timestamp or datetime.now().isoformat()
+        rows = [(
+            game.get("game_id", "unknown"),
+            game.get("timestamp", timestamp),
+            game.get("model_x"),
+            game.get("model_o"),
+            game.get("winner"),
+            game.get("move_count", 0),
+            game.get("duration_seconds", 0),
+            json.dumps(game, ensure_ascii=False)
+        ) for game in games]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO games (game_id, timestamp, model_x, model_o, winner, move_count, duration_seconds, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def flush(self):
+        """Valider une éventuelle transaction ouverte (append_many valide déjà chaque lot)"""
+        with self._lock:
+            if self._conn.in_transaction:
+                self._conn.commit()
+
+    def recent(self, limit: int = 10, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Dernières parties (index sur timestamp : coût proportionnel à limit)"""
+        query = "SELECT data FROM games"
+        params: list = []
+        if model:
+            query += " WHERE model_x = ? OR model_o = ?"
+            params += [model, model]
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM games WHERE game_id = ?", (game_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def iter_games(self, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Parcourir toutes les parties dans l'ordre d'insertion, par lots, sans tout charger en mémoire"""
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, data FROM games WHERE seq > ? ORDER BY seq LIMIT ?", (last_seq, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for seq, data in rows:
+                yield json.loads(data)
+            last_seq = rows[-1][0]
+
+    def import_json_files(self, log_dir: Path) -> int:
+        """Importer les anciens fichiers game_*.json (un fichier par partie)"""
+        imported = 0
+        batch: List[Dict[str, Any]] = []
+        for file_path in sorted(log_dir.glob("game_*.json")):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    game_data = json.load(f)
+            except Exception as e:
+                print(f"Erreur lecture {file_path}: {e}")
+                continue
+            mtime = datetime.fromtimestamp(file_path.stat().st_mtime).isoformat()
+            batch.append({"timestamp": mtime, **game_data})
+            imported += 1
+            if len(batch) >= self.batch_size:
+                self.append_many(batch)
+                batch = []
+        if batch:
+            self.append_many(batch)
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
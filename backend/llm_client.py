@@ -1,48 +1,157 @@
 import os
-import requests
+import time
+import asyncio
 import random
 import re
 import logging
-from dotenv import load_dotenv
-from azure_client import AzureClient
-
-load_dotenv()
+from typing import Optional
+import settings  # noqa: F401  (.env)
+from azure_client import get_azure_client
+from ollama_http import OllamaHTTP
+from ollama_scheduler import OllamaScheduler
+from move_cache import MoveCache
+from tactics import TacticalEngine
+from prompts import build_ollama_prompt, default_encoding, estimate_tokens
+from metrics import LLM_LATENCY, LLM_MOVE_LATENCY, LLM_ATTEMPTS, LLM_FAILURES, LLM_MOVES, LLM_TOKENS, ENGINE_SECONDS
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+
+# À incrémenter quand les prompts changent : invalide les coups mis en cache
+PROMPT_VERSION = "v3"
+
+# Adversaires de référence sans LLM : "engine:tactical" ou "engine:tactical:<profondeur>"
+ENGINE_MODELS = ["engine:tactical", "engine:tactical:2"]
+
 class LLMClient:
-    def __init__(self):
+    def __init__(self, move_cache: Optional[MoveCache] = None):
         self.ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
-        self.recent_moves = []
-        self.azure_client = AzureClient()
+        self.timeout = float(os.getenv("LLM_TIMEOUT", "20"))
+        self.azure_client = get_azure_client()
+        self.http = OllamaHTTP(self.ollama_url, timeout=self.timeout)
+        self.scheduler = OllamaScheduler(self.http)
+        self.move_cache = move_cache if move_cache is not None else MoveCache.from_env()
+        self.tactical_engine = TacticalEngine(depth=int(os.getenv("TACTICAL_DEPTH", "0")))
+
+    async def aclose(self):
+        """Fermer les connexions HTTP ouvertes et persister le cache de coups"""
+        await self.scheduler.aclose()
+        await self.http.aclose()
+        await self.azure_client.aclose()
+        if self.move_cache:
+            self.move_cache.save()
+
+    async def warm_up(self) -> dict:
+        """Préparer les clients avant la première partie : SDK Azure et connexion Ollama"""
+        start = time.perf_counter()
+        # L'import d'openai prend plusieurs centaines de ms : hors de la boucle d'événements
+        azure_ready = await asyncio.to_thread(lambda: self.azure_client.client is not None)
+        loaded = await self.scheduler.loaded_models(max_age=0)
+        return {
+            "azure": azure_ready,
+            "ollama_loaded_models": sorted(loaded),
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+
+    async def fetch_models(self) -> list:
+        """Interroger Ollama (/api/tags) ; lève une exception si Ollama ne répond pas"""
+        response = await self.http.get("/api/tags")
+        response.raise_for_status()
+        local_models = [model['name'] for model in response.json().get('models', [])]
+        return local_models + self.azure_client.get_azure_models() + ENGINE_MODELS
+
+    def fallback_models(self) -> list:
+        """Liste utilisée quand Ollama est injoignable"""
+        return ["phi3:3.8b"] + self.azure_client.get_azure_models() + ENGINE_MODELS
 
-    def get_available_models(self) -> list:
-        local_models = []
+    async def get_available_models(self) -> list:
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags")
-            if response.status_code == 200:
-                local_models = [model['name'] for model in response.json().get('models', [])]
+            return await self.fetch_models()
         except Exception as e:
             logger.warning(f"Erreur lors de la récupération des modèles locaux: {e}")
-            local_models = ["phi3:3.8b"]
-        
-        azure_models = self.azure_client.get_azure_models()
-        return local_models + azure_models
+            return self.fallback_models()
+
+    async def ask_move(self, grid: list, player: str, model: str, max_attempts: int = 3, timeout: Optional[float] = None, use_cache: bool = True, encoding: Optional[str] = None) -> dict:
+        """Demander un coup à un modèle (local ou Azure) avec validation
+
+        timeout borne chaque tentative (LLM_TIMEOUT par défaut) ; use_cache=False
+        force un nouvel échantillon même si le cache de coups est actif ;
+        encoding choisit la représentation du plateau (voir prompts.ENCODINGS).
+        Le résultat porte aussi la mesure du coup : latency_ms, attempts, tokens.
+        """
+        trace = {"attempts": 0, "prompt_tokens": 0, "completion_tokens": 0, "estimated_prompt_tokens": 0, "encoding": None}
+        start = time.perf_counter()
+        move = await self._ask_move(grid, player, model, max_attempts, timeout or self.timeout, use_cache, encoding, trace)
+        elapsed = time.perf_counter() - start
+
+        if move.get("cached"):
+            source = "cache"
+        elif move.get("fallback"):
+            source = "fallback"
+        elif model.startswith("engine:"):
+            source = "engine"
+        else:
+            source = "model"
+        LLM_MOVE_LATENCY.observe(elapsed, model=model)
+        LLM_MOVES.inc(model=model, source=source)
+        for kind in ("prompt", "completion", "estimated_prompt"):
+            if trace[f"{kind}_tokens"]:
+                LLM_TOKENS.inc(trace[f"{kind}_tokens"], model=model, kind=kind, encoding=trace["encoding"] or "")
+
+        move.update({
+            "latency_ms": round(elapsed * 1000, 2),
+            "attempts": trace["attempts"],
+            "tokens": {
+                "prompt": trace["prompt_tokens"],
+                "completion": trace["completion_tokens"],
+                "estimated_prompt": trace["estimated_prompt_tokens"]
+            },
+            "prompt_encoding": trace["encoding"]
+        })
+        return move
+
+    def _record_attempt(self, model: str, backend: str, elapsed: float, trace: dict, failure: Optional[str] = None):
+        trace["attempts"] += 1
+        LLM_ATTEMPTS.inc(model=model)
+        LLM_LATENCY.observe(elapsed, model=model, backend=backend)
+        if failure:
+            LLM_FAILURES.inc(model=model, reason=failure)
 
-    def ask_move(self, grid: list, player: str, model: str, max_attempts: int = 3) -> dict:
-        """Demander un coup à un modèle (local ou Azure) avec validation"""
+    async def _ask_move(self, grid: list, player: str, model: str, max_attempts: int, timeout: float, use_cache: bool, encoding: Optional[str], trace: dict) -> dict:
         empty_cells = [(i, j) for i in range(10) for j in range(10) if grid[i][j] == " "]
         if not empty_cells:
             return {"row": 0, "col": 0, "valid": False, "error": "grid_full"}
+
+        if model.startswith("engine:"):
+            return await self._engine_move(grid, player, model)
+
+        encoding = encoding or default_encoding("azure" if model.startswith("azure:") else "ollama")
+        trace["encoding"] = encoding
+
+        cache_key = None
+        if use_cache and self.move_cache is not None:
+            cache_key = self.move_cache.key_for(grid, player, model, f"{PROMPT_VERSION}:{encoding}")
+            cached = self.move_cache.get(*cache_key, len(grid))
+            if cached is not None:
+                cached_move = {"row": cached[0], "col": cached[1], "raw_response": "cache", "valid": True, "cached": True}
+                if self._is_valid_move(cached_move, grid):
+                    return self._accept_move(cached_move, grid, None)
         
         if model.startswith("azure:"):
             for attempt in range(max_attempts):
-                azure_response = self.azure_client.get_azure_move(grid, player, model)
+                attempt_start = time.perf_counter()
+                azure_response = await self.azure_client.get_azure_move(grid, player, model, timeout=timeout, encoding=encoding)
+                attempt_time = time.perf_counter() - attempt_start
+                trace["estimated_prompt_tokens"] += azure_response.get("estimated_prompt_tokens", 0)
+                usage = azure_response.get("usage") or {}
+                trace["prompt_tokens"] += usage.get("prompt_tokens", 0)
+                trace["completion_tokens"] += usage.get("completion_tokens", 0)
 
                 logger.info(f"AzureClient response (attempt {attempt+1}): {azure_response}")
                 
                 # Vérifier d'abord si la réponse contient une erreur
                 if azure_response.get("error"):
+                    self._record_attempt(model, "azure", attempt_time, trace, "unparseable" if azure_response.get("raw_response") else "error")
                     logger.warning(f"AzureClient error: {azure_response.get('error')}")
                     if attempt == max_attempts - 1:  # Dernière tentative
                         break
@@ -53,59 +162,69 @@ class LLMClient:
                     azure_response.get("row", -1) >= 0 and 
                     azure_response.get("col", -1) >= 0):
                     
-                    self.recent_moves.append((azure_response['row'], azure_response['col']))
-                    if len(self.recent_moves) > 5:
-                        self.recent_moves.pop(0)
-                    return {"row": azure_response['row'], "col": azure_response['col'], "valid": True}
+                    self._record_attempt(model, "azure", attempt_time, trace)
+                    return self._accept_move(
+                        {"row": azure_response['row'], "col": azure_response['col'], "raw_response": azure_response.get("raw_response", ""), "valid": True},
+                        grid, cache_key
+                    )
                 else:
+                    self._record_attempt(model, "azure", attempt_time, trace, "illegal")
                     logger.warning(f"Azure a proposé un coup invalide ({azure_response.get('row')}, {azure_response.get('col')})")
                     
             # Log clair de l'échec avant fallback
             logger.info(f"Échec après {max_attempts} tentatives avec Azure. Utilisation d'un coup stratégique.")
-            return self._select_strategic_move(empty_cells)
+            return await self._select_strategic_move(grid, player, empty_cells)
         
         # Pour les modèles locaux
         for attempt in range(max_attempts):
-            prompt = self._create_prompt(grid, player, empty_cells, attempt)
+            prompt = self._create_prompt(grid, player, empty_cells, attempt, encoding)
+            trace["estimated_prompt_tokens"] += estimate_tokens(prompt)
+            attempt_start = time.perf_counter()
             try:
-                response = requests.post(
-                    f"{self.ollama_url}/api/generate", 
-                    json={
-                        "model": model, 
-                        "prompt": prompt, 
+                # Regroupé avec les autres demandes du même modèle ; le délai couvre l'attente en file et l'appel
+                response = await self.scheduler.generate(
+                    model,
+                    {
+                        "prompt": prompt,
                         "stream": False,
                         "options": {"temperature": 0.3, "top_p": 0.3, "num_predict": 10}
-                    }, 
-                    timeout=20
+                    },
+                    timeout=timeout
                 )
+                attempt_time = time.perf_counter() - attempt_start
                 
                 if response.status_code == 200:
-                    llm_response = response.json().get("response", "").strip()
+                    data = response.json()
+                    trace["prompt_tokens"] += data.get("prompt_eval_count", 0)
+                    trace["completion_tokens"] += data.get("eval_count", 0)
+                    llm_response = data.get("response", "").strip()
                     parsed_move = self._parse_response(llm_response, empty_cells)
                     if self._is_valid_move(parsed_move, grid):
-                        self.recent_moves.append((parsed_move['row'], parsed_move['col']))
-                        if len(self.recent_moves) > 5:
-                            self.recent_moves.pop(0)
-                        return parsed_move
+                        self._record_attempt(model, "ollama", attempt_time, trace)
+                        return self._accept_move(parsed_move, grid, cache_key)
+                    self._record_attempt(model, "ollama", attempt_time, trace, "unparseable" if parsed_move["row"] < 0 else "illegal")
+                else:
+                    self._record_attempt(model, "ollama", attempt_time, trace, f"http_{response.status_code}")
+            except asyncio.TimeoutError:
+                self._record_attempt(model, "ollama", time.perf_counter() - attempt_start, trace, "timeout")
+                logger.warning(f"Délai dépassé ({timeout}s) pour le modèle local {model}")
+                continue
             except Exception as e:
+                self._record_attempt(model, "ollama", time.perf_counter() - attempt_start, trace, "error")
                 logger.error(f"Erreur modèle local {model}: {e}")
                 continue
         
-        return self._select_strategic_move(empty_cells)
+        return await self._select_strategic_move(grid, player, empty_cells)
 
-    def _create_prompt(self, grid: list, player: str, empty_cells: list, attempt: int) -> str:
-        grid_visual = "   0 1 2 3 4 5 6 7 8 9\n  +-------------------+\n"
-        for i, row in enumerate(grid):
-            grid_visual += f"{i} |" + "".join(f" {'.' if cell==' ' else cell}" for cell in row) + " |\n"
-        grid_visual += "  +-------------------+\n"
-        
-        if attempt == 0:
-            available_cells = [c for c in empty_cells if c not in self.recent_moves][:8]
-            return f"{grid_visual}Player {player}, available cells: {available_cells}. Answer: row,column"
-        elif attempt == 1:
-            return f"{grid_visual}Player {player}, answer ONLY: row,column (e.g. 3,5)"
-        else:
-            return f"Player {player}, give two numbers (row, column): "
+    def _accept_move(self, move: dict, grid: list, cache_key: Optional[tuple]) -> dict:
+        """Retenir un coup validé ; seuls les coups réellement proposés par le modèle sont mis en cache"""
+        if cache_key is not None and self.move_cache is not None and not move.get("fallback"):
+            self.move_cache.put(*cache_key, len(grid), move['row'], move['col'])
+        return move
+
+    def _create_prompt(self, grid: list, player: str, empty_cells: list, attempt: int, encoding: str = "ascii") -> str:
+        available_cells = empty_cells[:8] if attempt == 0 else []
+        return build_ollama_prompt(grid, player, available_cells, attempt, encoding)
 
     def _parse_response(self, response: str, empty_cells: list) -> dict:
         patterns = [r'^\s*(\d)\s*,\s*(\d)\s*$', r'(\d)\s*[,.\-\s]?\s*(\d)']
@@ -119,29 +238,66 @@ class LLMClient:
         if len(numbers) >= 2: 
             return self._validate_move(int(numbers[0]), int(numbers[1]), empty_cells, response)
         
-        return self._select_random_move(empty_cells, response)
+        return {"row": -1, "col": -1, "raw_response": response, "valid": False}
 
     def _validate_move(self, row: int, col: int, empty_cells: list, response: str) -> dict:
-        valid = (row, col) in empty_cells and (row, col) not in self.recent_moves
+        valid = (row, col) in empty_cells
         return {"row": row, "col": col, "raw_response": response, "valid": valid}
 
     def _select_random_move(self, empty_cells: list, response: str) -> dict:
-        non_recent = [c for c in empty_cells if c not in self.recent_moves]
-        if not non_recent:
-            non_recent = empty_cells
-        row, col = random.choice(non_recent)
-        return {"row": row, "col": col, "raw_response": f"random: {response}", "valid": True}
-
-    def _select_strategic_move(self, empty_cells: list) -> dict:
-        center_cells = [(4,4), (4,5), (5,4), (5,5)]
-        for cell in center_cells:
-            if cell in empty_cells and cell not in self.recent_moves:
-                return {"row": cell[0], "col": cell[1], "raw_response": "strategic", "valid": True}
-        return self._select_random_move(empty_cells, "fallback")
+        row, col = random.choice(empty_cells)
+        return {"row": row, "col": col, "raw_response": f"random: {response}", "valid": True, "fallback": True}
+
+    async def _select_strategic_move(self, grid: list, player: str, empty_cells: list) -> dict:
+        """Coup de secours calculé par le moteur tactique local"""
+        with ENGINE_SECONDS.time(operation="tactical_fallback"):
+            if self.tactical_engine.depth > 0:
+                # Recherche alpha-beta : hors de la boucle d'événements
+                move = await asyncio.to_thread(self.tactical_engine.best_move, grid, player)
+            else:
+                move = self.tactical_engine.best_move(grid, player)
+        if move is None:
+            return self._select_random_move(empty_cells, "fallback")
+        return {"row": move[0], "col": move[1], "raw_response": "tactical", "valid": True, "fallback": True}
+
+    async def _engine_move(self, grid: list, player: str, model: str) -> dict:
+        """Coup joué par le moteur tactique utilisé comme adversaire"""
+        parts = model.split(":")
+        depth = 0
+        if len(parts) > 2:
+            try:
+                depth = max(0, int(parts[2]))
+            except ValueError:
+                logger.warning(f"Profondeur invalide dans {model}, profondeur par défaut")
+        with ENGINE_SECONDS.time(operation=f"tactical_depth_{depth}"):
+            if depth > 0:
+                # Recherche alpha-beta : hors de la boucle d'événements
+                move = await asyncio.to_thread(self.tactical_engine.best_move, grid, player, depth)
+            else:
+                move = self.tactical_engine.best_move(grid, player, depth)
+        if move is None:
+            return {"row": 0, "col": 0, "valid": False, "error": "grid_full"}
+        return {"row": move[0], "col": move[1], "raw_response": model, "valid": True}
 
     def _is_valid_move(self, move: dict, grid: list) -> bool:
         row, col = move.get("row", -1), move.get("col", -1)
+        # Seule la grille de la partie compte : le client est partagé par les parties en cours
         return (0 <= row < 10 and 
                 0 <= col < 10 and 
-                grid[row][col] == " " and 
-                (row, col) not in self.recent_moves)
\ No newline at end of file
+                grid[row][col] == " ")
+
+_llm_client: Optional[LLMClient] = None
+
+def get_llm_client() -> LLMClient:
+    """Client LLM partagé par tout le processus (créé au premier appel, dans la boucle d'événements)"""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient()
+    return _llm_client
+
+async def close_llm_client():
+    """Fermer le client partagé ; l'appel suivant à get_llm_client() en crée un nouveau"""
+    global _llm_client
+    client, _llm_client = _llm_client, None
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,88 @@
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, List
+
+from metrics import LOGGER_DROPPED
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class BackgroundLogWriter:
+    """Écriture des journaux dans un thread dédié, par lots
+
+    submit() ne fait que mettre la partie en file : l'appelant (la requête
+    HTTP, sur la boucle d'événements) ne paie jamais les entrées/sorties
+    disque et n'attend jamais. Quand la file est pleine, la partie est
+    abandonnée, journalisée en erreur et comptée (dropped, game_logger_dropped_total).
+    """
+
+    def __init__(self, handler: Callable[[List[Dict[str, Any]]], None], max_queue: int = 10000, batch_size: int = 100):
+        self.handler = handler
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._stats = {
+            "submitted": 0, "written": 0, "batches": 0, "errors": 0,
+            "dropped": 0, "max_queue_depth": 0
+        }
+        self._thread = threading.Thread(target=self._run, name="game-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Dict[str, Any]):
+        """Mettre une partie en file d'écriture"""
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._stats["dropped"] += 1
+            LOGGER_DROPPED.inc()
+            logger.error(f"File d'écriture pleine ({self._queue.maxsize}), partie {item.get('game_id')} non journalisée")
+            return
+        self._stats["submitted"] += 1
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queue.qsize())
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            # Regrouper ce qui est déjà en file, sans dépasser batch_size
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self.handler(batch)
+                self._stats["written"] += len(batch)
+                self._stats["batches"] += 1
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"Échec d'écriture de {len(batch)} parties: {e}")
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """Attendre que toutes les parties en file soient écrites"""
+        self._queue.join()
+
+    def close(self):
+        """Écrire ce qui reste en file puis arrêter le thread"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "queue_depth": self._queue.qsize()}
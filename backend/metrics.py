@@ -0,0 +1,146 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple, Union
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 60.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], le: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if le:
+        parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    """Compteur monotone avec étiquettes"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    """Histogramme cumulatif (format Prometheus) avec étiquettes"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Par jeu d'étiquettes : [compteurs par intervalle..., somme, nombre]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, str(bound))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, '+Inf')} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """Ensemble de métriques exposées au format texte Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Union[Counter, Histogram]] = {}
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = self._metrics.setdefault(name, Counter(name, help_text, labelnames))
+        if not isinstance(metric, Counter):
+            raise ValueError(f"Métrique {name} déjà enregistrée avec un autre type")
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = self._metrics.setdefault(name, Histogram(name, help_text, labelnames, buckets))
+        if not isinstance(metric, Histogram):
+            raise ValueError(f"Métrique {name} déjà enregistrée avec un autre type")
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+LLM_LATENCY = registry.histogram("llm_request_seconds", "Durée d'une tentative d'appel au modèle", ["model", "backend"])
+LLM_MOVE_LATENCY = registry.histogram("llm_move_seconds", "Durée totale d'ask_move (toutes tentatives)", ["model"])
+LLM_ATTEMPTS = registry.counter("llm_attempts_total", "Tentatives d'appel au modèle", ["model"])
+LLM_FAILURES = registry.counter("llm_failed_attempts_total", "Tentatives sans coup exploitable", ["model", "reason"])
+LLM_MOVES = registry.counter("llm_moves_total", "Coups renvoyés par ask_move", ["model", "source"])
+LLM_TOKENS = registry.counter("llm_tokens_total", "Jetons consommés (estimated_prompt : estimation locale)", ["model", "kind", "encoding"])
+ENGINE_SECONDS = registry.histogram("engine_seconds", "Temps passé dans le moteur de jeu", ["operation"],
+                                    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5))
+LOGGER_SECONDS = registry.histogram("game_logger_seconds", "Temps passé dans le journal des parties", ["operation"],
+                                    buckets=(0.00001, 0.0001, 0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+LOGGER_DROPPED = registry.counter("game_logger_dropped_total", "Parties non journalisées : file d'écriture pleine")
+
+
+def summarize_moves(moves: List[dict]) -> dict:
+    """Mesures agrégées d'une partie, à partir des coups enregistrés"""
+    summary: Dict[str, dict] = {}
+    for move in moves:
+        model = summary.setdefault(move.get("model") or "unknown", {
+            "moves": 0, "llm_time_ms": 0.0, "attempts": 0, "fallbacks": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "estimated_prompt_tokens": 0
+        })
+        model["moves"] += 1
+        model["llm_time_ms"] += move.get("latency_ms", 0.0)
+        model["attempts"] += move.get("attempts", 0)
+        model["fallbacks"] += bool(move.get("fallback"))
+        tokens = move.get("tokens") or {}
+        model["prompt_tokens"] += tokens.get("prompt", 0)
+        model["completion_tokens"] += tokens.get("completion", 0)
+        model["estimated_prompt_tokens"] += tokens.get("estimated_prompt", 0)
+    for model in summary.values():
+        model["llm_time_ms"] = round(model["llm_time_ms"], 2)
+        model["avg_latency_ms"] = round(model["llm_time_ms"] / model["moves"], 2) if model["moves"] else 0.0
+    return summary
@@ -0,0 +1,298 @@
+import os
+import re
+import math
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import logging
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from prompts import estimate_tokens
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+# Réponses inexploitables, du bavardage au format inattendu
+MALFORMED_ANSWERS = (
+    "I would play in the center of the board.",
+    "Let me think about the best move here...",
+    "row five, column three",
+    "X",
+    "",
+)
+
+_ROW_RE = re.compile(r"^\s*(\d+)\s*[:|]\s?(.*?)\s*\|?\s*$")
+_STONES_RE = re.compile(r"^([XO]): (.*)$")
+_SIZE_RE = re.compile(r"(\d+)x(\d+) board")
+_CELL_RE = re.compile(r"\((\d+),\s*(\d+)\)")
+
+def empty_cells_from_prompt(prompt: str) -> List[Tuple[int, int]]:
+    """Cases libres d'après le plateau du prompt (tous les encodages de prompts.py)"""
+    size = _SIZE_RE.search(prompt)
+    if size:
+        # Encodage "stones" : seules les pierres posées sont listées
+        occupied = set()
+        for line in prompt.splitlines():
+            match = _STONES_RE.match(line)
+            if match and match.group(2) != "none":
+                occupied.update(tuple(map(int, stone.split(","))) for stone in match.group(2).split())
+        rows, cols = int(size.group(1)), int(size.group(2))
+        return [(i, j) for i in range(rows) for j in range(cols) if (i, j) not in occupied]
+
+    empty = []
+    for line in prompt.splitlines():
+        match = _ROW_RE.match(line)
+        if not match:
+            continue
+        cells = [cell for cell in match.group(2) if cell in ".XO"]
+        empty += [(int(match.group(1)), j) for j, cell in enumerate(cells) if cell == "."]
+    if empty:
+        return empty
+    # Dernier recours : la liste "available cells" du premier prompt Ollama
+    return [(int(r), int(c)) for r, c in _CELL_RE.findall(prompt)]
+
+class MockLLM:
+    """Remplaçant déterministe d'Ollama et d'Azure OpenAI pour les tests de charge
+
+    Les réponses ne dépendent que de la graine, du modèle, du prompt et du
+    nombre de fois où ce prompt a déjà été reçu : deux exécutions avec la
+    même graine donnent les mêmes coups, quel que soit l'ordre d'arrivée
+    des requêtes concurrentes.
+
+    Latence : mean (s) et jitter selon distribution :
+    - fixed     : toujours mean
+    - uniform   : mean ± jitter
+    - normal    : moyenne mean, écart-type jitter (tronquée à 0)
+    - lognormal : médiane mean, jitter = écart-type du logarithme (longue traîne)
+
+    Comme Ollama, au plus max_loaded modèles restent en mémoire ; un modèle
+    absent coûte load_seconds de plus (load_duration dans la réponse), et au
+    plus parallel requêtes sont traitées à la fois (0 : sans limite).
+    """
+
+    def __init__(self, models: Optional[List[str]] = None, seed: Optional[int] = None,
+                 latency: Optional[float] = None, jitter: Optional[float] = None,
+                 distribution: Optional[str] = None, error_rate: Optional[float] = None,
+                 error_status: Optional[int] = None, malformed_rate: Optional[float] = None,
+                 illegal_rate: Optional[float] = None, load_seconds: Optional[float] = None,
+                 max_loaded: Optional[int] = None, parallel: Optional[int] = None):
+        self.models = models or os.getenv("MOCK_MODELS", "mock-a:1b,mock-b:1b,mock-c:1b").split(",")
+        self.seed = seed if seed is not None else int(os.getenv("MOCK_SEED", "0"))
+        self.latency = latency if latency is not None else float(os.getenv("MOCK_LATENCY", "0.05"))
+        self.jitter = jitter if jitter is not None else float(os.getenv("MOCK_JITTER", "0.0"))
+        self.distribution = distribution or os.getenv("MOCK_DISTRIBUTION", "fixed")
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("MOCK_ERROR_RATE", "0"))
+        self.error_status = error_status or int(os.getenv("MOCK_ERROR_STATUS", "500"))
+        self.malformed_rate = malformed_rate if malformed_rate is not None else float(os.getenv("MOCK_MALFORMED_RATE", "0"))
+        self.illegal_rate = illegal_rate if illegal_rate is not None else float(os.getenv("MOCK_ILLEGAL_RATE", "0"))
+        self.load_seconds = load_seconds if load_seconds is not None else float(os.getenv("MOCK_LOAD_SECONDS", "0"))
+        self.max_loaded = max_loaded or int(os.getenv("MOCK_MAX_LOADED", "2"))
+        self.parallel = parallel if parallel is not None else int(os.getenv("MOCK_PARALLEL", "0"))
+        if self.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Distribution inconnue: {self.distribution} (attendu: {', '.join(DISTRIBUTIONS)})")
+        self.reset()
+
+    def reset(self):
+        """Repartir de zéro : mêmes réponses qu'au démarrage, statistiques remises à zéro"""
+        self._seen: Counter = Counter()
+        # Modèles en mémoire, du moins au plus récemment utilisé
+        self.resident: "OrderedDict[str, float]" = OrderedDict()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._stats: Counter = Counter()
+        self._by_model: Counter = Counter()
+
+    def _rng(self, model: str, prompt: str) -> random.Random:
+        key = f"{model}\0{prompt}"
+        self._seen[key] += 1
+        digest = hashlib.sha256(f"{self.seed}\0{key}\0{self._seen[key]}".encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _delay(self, rng: random.Random) -> float:
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(self.latency - self.jitter, self.latency + self.jitter))
+        if self.distribution == "normal":
+            return max(0.0, rng.gauss(self.latency, self.jitter))
+        if self.distribution == "lognormal" and self.latency > 0:
+            return rng.lognormvariate(math.log(self.latency), self.jitter)
+        return self.latency
+
+    def _load(self, model: str) -> float:
+        """Charger model si besoin ; retourne le temps de chargement simulé"""
+        if model in self.resident:
+            self.resident.move_to_end(model)
+            return 0.0
+        self.resident[model] = time.time()
+        while len(self.resident) > self.max_loaded:
+            self.resident.popitem(last=False)
+        self._stats["cold_loads"] += 1
+        return self.load_seconds
+
+    def answer(self, rng: random.Random, prompt: str) -> Tuple[Optional[str], str]:
+        """(texte de la réponse, issue) ; texte None pour une erreur HTTP"""
+        draw = rng.random()
+        if draw < self.error_rate:
+            return None, "errors"
+        draw -= self.error_rate
+        if draw < self.malformed_rate:
+            return rng.choice(MALFORMED_ANSWERS), "malformed"
+        draw -= self.malformed_rate
+
+        empty = empty_cells_from_prompt(prompt)
+        if draw < self.illegal_rate and empty:
+            # Une case occupée (ou hors plateau si le plateau est vide)
+            empty_set = set(empty)
+            size = max(max(r, c) for r, c in empty) + 1
+            occupied = [(r, c) for r in range(size) for c in range(size) if (r, c) not in empty_set]
+            row, col = rng.choice(occupied) if occupied else (size, size)
+            return f"{row},{col}", "illegal"
+        row, col = rng.choice(empty) if empty else (rng.randrange(10), rng.randrange(10))
+        return f"{row},{col}", "moves"
+
+    async def complete(self, model: str, prompt: str, local: bool = True) -> Dict[str, Any]:
+        """Simuler une génération : latence, chargement du modèle (local), réponse"""
+        if self.parallel and self._slots is None:
+            self._slots = asyncio.Semaphore(self.parallel)
+        rng = self._rng(model, prompt)
+        text, outcome = self.answer(rng, prompt)
+        delay = self._delay(rng)
+        self._stats["requests"] += 1
+        self._stats[outcome] += 1
+        self._by_model[model] += 1
+
+        if self._slots:
+            async with self._slots:
+                load = self._load(model) if local else 0.0
+                await asyncio.sleep(delay + load)
+        else:
+            load = self._load(model) if local else 0.0
+            await asyncio.sleep(delay + load)
+        return {
+            "text": text,
+            "load_seconds": load,
+            "seconds": delay + load,
+            "prompt_tokens": estimate_tokens(prompt),
+            "completion_tokens": estimate_tokens(text) if text else 0
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **{key: self._stats[key] for key in ("requests", "moves", "illegal", "malformed", "errors", "cold_loads")},
+            "by_model": dict(self._by_model),
+            "resident": list(self.resident),
+            "seed": self.seed,
+            "latency": self.latency,
+            "distribution": self.distribution
+        }
+
+def create_app(mock: Optional[MockLLM] = None) -> FastAPI:
+    """Application servant les routes Ollama (/api/...) et Azure OpenAI (/openai/...)
+
+    Utilisable par le réseau (uvicorn) ou dans le processus via httpx.ASGITransport.
+    """
+    mock = mock or MockLLM()
+    app = FastAPI(title="Mock LLM")
+    app.state.mock = mock
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": model, "model": model, "size": 0} for model in mock.models]}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": [{"name": model, "model": model, "size_vram": 0} for model in mock.resident]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        model = body.get("model", "")
+        if model not in mock.models:
+            return JSONResponse({"error": f"model '{model}' not found"}, status_code=404)
+        result = await mock.complete(model, body.get("prompt", ""))
+        if result["text"] is None:
+            return JSONResponse({"error": "mock failure"}, status_code=mock.error_status)
+        return {
+            "model": model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "response": result["text"],
+            "done": True,
+            "done_reason": "stop",
+            # Durées en nanosecondes, comme Ollama
+            "total_duration": int(result["seconds"] * 1e9),
+            "load_duration": int(result["load_seconds"] * 1e9),
+            "prompt_eval_count": result["prompt_tokens"],
+            "eval_count": result["completion_tokens"]
+        }
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        body = await request.json()
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        result = await mock.complete(f"azure:{deployment}", prompt, local=False)
+        if result["text"] is None:
+            return JSONResponse({"error": {"code": "mock_failure", "message": "mock failure"}},
+                                status_code=mock.error_status)
+        return {
+            "id": f"chatcmpl-mock-{mock._stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": deployment,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": result["text"]},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": result["prompt_tokens"],
+                "completion_tokens": result["completion_tokens"],
+                "total_tokens": result["prompt_tokens"] + result["completion_tokens"]
+            }
+        }
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return mock.stats()
+
+    @app.post("/mock/reset")
+    async def mock_reset():
+        mock.reset()
+        return {"status": "reset"}
+
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Faux serveur Ollama / Azure OpenAI, déterministe")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--models", help="Modèles Ollama servis, séparés par des virgules")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--latency", type=float, help="Latence moyenne (s)")
+    parser.add_argument("--jitter", type=float)
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS)
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--error-status", type=int)
+    parser.add_argument("--malformed-rate", type=float)
+    parser.add_argument("--illegal-rate", type=float)
+    parser.add_argument("--load-seconds", type=float, help="Coût d'un chargement de modèle (s)")
+    parser.add_argument("--max-loaded", type=int, help="Modèles gardés en mémoire")
+    parser.add_argument("--parallel", type=int, help="Requêtes traitées simultanément (0 : sans limite)")
+    args = parser.parse_args()
+
+    import uvicorn
+    mock = MockLLM(
+        models=args.models.split(",") if args.models else None, seed=args.seed,
+        latency=args.latency, jitter=args.jitter, distribution=args.distribution,
+        error_rate=args.error_rate, error_status=args.error_status,
+        malformed_rate=args.malformed_rate, illegal_rate=args.illegal_rate,
+        load_seconds=args.load_seconds, max_loaded=args.max_loaded, parallel=args.parallel
+    )
+    logger.info(f"Mock LLM : OLLAMA_URL=http://{args.host}:{args.port} "
+                f"AZURE_ENDPOINT=http://{args.host}:{args.port} AZURE_API_KEY=mock")
+    uvicorn.run(create_app(mock), host=args.host, port=args.port, log_level="warning")
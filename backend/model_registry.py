@@ -0,0 +1,98 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """Cache des modèles disponibles avec TTL (stale-while-revalidate)
+
+    Une liste périmée est servie immédiatement pendant qu'un rafraîchissement
+    tourne en arrière-plan ; seul le tout premier appel attend Ollama, et au
+    plus `timeout` secondes avant de servir la liste de secours.
+    """
+
+    def __init__(self, fetcher: Callable[[], Awaitable[List[str]]], fallback: Callable[[], List[str]],
+                 ttl: Optional[float] = None, timeout: Optional[float] = None):
+        self.fetcher = fetcher
+        self.fallback = fallback
+        self.ttl = ttl if ttl is not None else float(os.getenv("MODELS_CACHE_TTL", "60"))
+        self.timeout = timeout if timeout is not None else float(os.getenv("MODELS_FETCH_TIMEOUT", "2"))
+        self._models: Optional[List[str]] = None
+        self._fetched_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._periodic_task: Optional[asyncio.Task] = None
+
+    def is_stale(self) -> bool:
+        return self._models is None or time.monotonic() - self._fetched_at >= self.ttl
+
+    async def _refresh(self):
+        try:
+            models = await self.fetcher()
+        except Exception as e:
+            logger.warning(f"Rafraîchissement des modèles impossible: {e}")
+            if self._models is None:
+                # Servir la liste de secours, marquée périmée pour réessayer au prochain appel
+                self._models = self.fallback()
+            return
+        self._models = models
+        self._fetched_at = time.monotonic()
+
+    def _schedule_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return self._refresh_task
+
+    async def get_models(self) -> List[str]:
+        """Liste des modèles, sans jamais bloquer plus de `timeout` secondes"""
+        if self.is_stale():
+            task = self._schedule_refresh()
+            if self._models is None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(task), self.timeout)
+                except asyncio.TimeoutError:
+                    logger.warning("Ollama trop lent, utilisation de la liste de secours")
+                    return self.fallback()
+        return list(self._models or [])
+
+    async def refresh(self) -> List[str]:
+        """Forcer un rafraîchissement et attendre son résultat"""
+        await self._schedule_refresh()
+        return list(self._models or [])
+
+    def invalidate(self):
+        """Marquer le cache comme périmé et relancer un rafraîchissement en arrière-plan"""
+        self._fetched_at = 0.0
+        self._schedule_refresh()
+
+    def status(self) -> dict:
+        return {
+            "models": list(self._models or []),
+            "age_seconds": time.monotonic() - self._fetched_at if self._fetched_at else None,
+            "stale": self.is_stale(),
+            "ttl": self.ttl
+        }
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.ttl)
+            await self._schedule_refresh()
+
+    def start(self):
+        """Démarrer le rafraîchissement périodique en arrière-plan"""
+        self._schedule_refresh()
+        if self._periodic_task is None:
+            self._periodic_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self):
+        for task in (self._periodic_task, self._refresh_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._periodic_task = None
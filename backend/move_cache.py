@@ -0,0 +1,119 @@
+import os
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Les 8 symétries du carré, appliquées à une case (r, c) d'une grille n x n
+SYMMETRIES = (
+    lambda r, c, n: (r, c),
+    lambda r, c, n: (c, n - 1 - r),
+    lambda r, c, n: (n - 1 - r, n - 1 - c),
+    lambda r, c, n: (n - 1 - c, r),
+    lambda r, c, n: (r, n - 1 - c),
+    lambda r, c, n: (n - 1 - r, c),
+    lambda r, c, n: (c, r),
+    lambda r, c, n: (n - 1 - c, n - 1 - r),
+)
+# Indice de la symétrie inverse de chacune des symétries ci-dessus
+INVERSES = (0, 3, 2, 1, 4, 5, 6, 7)
+
+class MoveCache:
+    """Cache LRU des coups proposés par les modèles
+
+    La clé combine modèle, version de prompt, joueur et forme canonique de la
+    grille (la plus petite de ses 8 symétries) : une ouverture déjà vue sous une
+    rotation ou un miroir réutilise la même entrée. Les coups sont stockés dans
+    le repère canonique et ramenés dans le repère de la grille à la lecture.
+    """
+
+    def __init__(self, max_size: int = 10000, path: Optional[str] = None):
+        self.max_size = max_size
+        self.path = Path(path) if path else None
+        self._entries: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.path and self.path.exists():
+            self.load()
+
+    @classmethod
+    def from_env(cls) -> Optional["MoveCache"]:
+        """Cache configuré par MOVE_CACHE / MOVE_CACHE_SIZE / MOVE_CACHE_PATH, ou None si désactivé"""
+        if os.getenv("MOVE_CACHE", "0").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(int(os.getenv("MOVE_CACHE_SIZE", "10000")), os.getenv("MOVE_CACHE_PATH") or None)
+
+    def key_for(self, grid: list, player: str, model: str, prompt_version: str) -> Tuple[str, int]:
+        """Clé canonique de la position et indice de la symétrie qui y mène"""
+        n = len(grid)
+        best, best_transform = None, 0
+        for index, transform in enumerate(SYMMETRIES):
+            cells = [[" "] * n for _ in range(n)]
+            for r, row in enumerate(grid):
+                for c, cell in enumerate(row):
+                    if cell != " ":
+                        tr, tc = transform(r, c, n)
+                        cells[tr][tc] = cell
+            flat = "".join("".join(row) for row in cells)
+            if best is None or flat < best:
+                best, best_transform = flat, index
+        digest = hashlib.sha1(f"{model}|{prompt_version}|{player}|{n}|{best}".encode()).hexdigest()
+        return digest, best_transform
+
+    def get(self, key: str, transform: int, n: int) -> Optional[Tuple[int, int]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return SYMMETRIES[INVERSES[transform]](entry[0], entry[1], n)
+
+    def put(self, key: str, transform: int, n: int, row: int, col: int):
+        self._entries[key] = SYMMETRIES[transform](row, col, n)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def load(self):
+        """Charger le cache depuis le disque (ordre LRU conservé)"""
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.warning(f"Lecture du cache de coups impossible ({self.path}): {e}")
+            return
+        for key, (row, col) in entries[-self.max_size:]:
+            self._entries[key] = (row, col)
+
+    def save(self):
+        """Écrire le cache sur disque (écriture atomique)"""
+        if not self.path:
+            return
+        tmp_file = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump([[key, list(move)] for key, move in self._entries.items()], f)
+        os.replace(tmp_file, self.path)
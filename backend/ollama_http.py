@@ -0,0 +1,87 @@
+import os
+import asyncio
+import logging
+import httpx
+from typing import Any, Dict, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Erreurs pour lesquelles la requête n'a pas été traitée par Ollama : on peut la rejouer
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError, httpx.PoolTimeout)
+RETRYABLE_STATUS = (429, 502, 503, 504)
+
+class OllamaHTTP:
+    """Session HTTP persistante (keep-alive) vers le démon Ollama
+
+    Le pool est dédié à l'hôte Ollama : max_connections est donc une limite par hôte.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 20.0, pool_size: Optional[int] = None,
+                 keepalive_expiry: Optional[float] = None, retries: Optional[int] = None,
+                 backoff: Optional[float] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self.pool_size = pool_size or int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+        self.keepalive_expiry = keepalive_expiry if keepalive_expiry is not None else float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+        self.retries = retries if retries is not None else int(os.getenv("OLLAMA_RETRIES", "2"))
+        self.backoff = backoff if backoff is not None else float(os.getenv("OLLAMA_BACKOFF", "0.2"))
+
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            transport=transport
+        )
+        self._stats = {"requests": 0, "new_connections": 0, "retries": 0, "errors": 0}
+
+    async def _trace(self, event: str, info: Dict[str, Any]):
+        # Émis par httpcore uniquement quand une nouvelle connexion TCP est ouverte
+        if event == "connection.connect_tcp.complete":
+            self._stats["new_connections"] += 1
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Envoyer une requête en rejouant les erreurs de connexion avec backoff exponentiel"""
+        extensions = {"trace": self._trace}
+        for attempt in range(self.retries + 1):
+            self._stats["requests"] += 1
+            try:
+                response = await self.client.request(method, path, extensions=extensions, **kwargs)
+                if response.status_code not in RETRYABLE_STATUS or attempt == self.retries:
+                    return response
+                logger.warning(f"Ollama {path}: statut {response.status_code}, nouvelle tentative")
+            except RETRYABLE_ERRORS as e:
+                self._stats["errors"] += 1
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"Ollama {path}: {type(e).__name__}, nouvelle tentative")
+            except httpx.HTTPError:
+                self._stats["errors"] += 1
+                raise
+            self._stats["retries"] += 1
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+        raise RuntimeError("unreachable")
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques de réutilisation des connexions"""
+        requests = self._stats["requests"]
+        reused = max(requests - self._stats["new_connections"] - self._stats["errors"], 0)
+        return {
+            **self._stats,
+            "reused_connections": reused,
+            "reuse_ratio": reused / requests if requests else 0.0,
+            "pool_size": self.pool_size,
+            "keepalive_expiry": self.keepalive_expiry
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
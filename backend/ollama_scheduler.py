@@ -0,0 +1,197 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+import httpx
+
+from ollama_http import OllamaHTTP
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Au-delà, le modèle a vraisemblablement été (re)chargé en mémoire pour la requête
+COLD_LOAD_SECONDS = 0.1
+
+class OllamaScheduler:
+    """Planificateur des appels /api/generate : une file par modèle
+
+    Les modèles déjà en mémoire côté Ollama (d'après /api/ps, ou après une
+    réponse) se partagent les num_parallel requêtes simultanées (à aligner sur
+    OLLAMA_NUM_PARALLEL du serveur), la demande la plus ancienne d'abord.
+
+    Seuls les chargements sont sérialisés : un modèle absent de la mémoire
+    n'est envoyé qu'une fois les requêtes en cours terminées, pour ne pas
+    forcer Ollama à charger un modèle pendant qu'il en sert d'autres. Parmi
+    les modèles à charger, on prend celui qui a le plus de demandes en attente.
+    Pour ne pas l'affamer, on cesse d'envoyer des requêtes aux modèles en
+    mémoire dès que sa plus ancienne demande attend depuis plus de max_wait
+    secondes, ou après max_batch envois depuis le dernier chargement.
+    """
+
+    def __init__(self, http: OllamaHTTP, num_parallel: Optional[int] = None,
+                 keep_alive: Optional[str] = None, max_batch: Optional[int] = None,
+                 max_wait: Optional[float] = None, ps_interval: float = 5.0):
+        self.http = http
+        self.num_parallel = num_parallel or int(os.getenv("OLLAMA_NUM_PARALLEL", "1"))
+        self.keep_alive = keep_alive or os.getenv("OLLAMA_KEEP_ALIVE", "10m")
+        self.max_batch = max_batch or int(os.getenv("OLLAMA_MAX_BATCH", "32"))
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv("OLLAMA_MAX_WAIT", "5"))
+        self.ps_interval = ps_interval
+
+        # Modèles en mémoire côté Ollama (rafraîchi via /api/ps)
+        self.loaded: Set[str] = set()
+        self._loaded_at = 0.0
+        self._ps_task: Optional[asyncio.Task] = None
+
+        # modèle -> [(payload, future, timeout, heure d'arrivée)]
+        self._queues: Dict[str, Deque[Tuple[Dict[str, Any], asyncio.Future, Optional[float], float]]] = {}
+        # Recréé pour chaque boucle d'événements (_ensure_started)
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Dernier modèle chargé ; ses demandes partent sans attendre la fin des autres
+        self.active_model: Optional[str] = None
+        self._streak = 0
+        self.in_flight = 0
+        self._stats = {"dispatched": 0, "swaps": 0, "cold_loads": 0, "batches": 0, "cancelled": 0, "queue_wait_seconds": 0.0}
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            if self._loop is not loop:
+                # Nouvelle boucle d'événements : les demandes de l'ancienne sont perdues
+                self._queues = {}
+                self.in_flight = 0
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+        return loop
+
+    async def generate(self, model: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> httpx.Response:
+        """Mettre une génération en file ; timeout borne l'attente en file et la requête HTTP
+
+        Au-delà, asyncio.TimeoutError : une demande encore en file est abandonnée
+        (le planificateur l'ignore), une requête déjà envoyée n'est plus attendue.
+        """
+        future = self._ensure_started().create_future()
+        self._queues.setdefault(model, deque()).append((payload, future, timeout, time.perf_counter()))
+        self._wakeup.set()
+        return await asyncio.wait_for(future, timeout)
+
+    async def loaded_models(self, max_age: Optional[float] = None) -> Set[str]:
+        """Modèles actuellement en mémoire d'après /api/ps (ensemble vide si indisponible)"""
+        if time.monotonic() - self._loaded_at > (self.ps_interval if max_age is None else max_age):
+            try:
+                response = await self.http.get("/api/ps")
+                response.raise_for_status()
+                self.loaded = {model["name"] for model in response.json().get("models", [])}
+            except Exception as e:
+                logger.warning(f"Impossible de lire /api/ps: {e}")
+            self._loaded_at = time.monotonic()
+        return self.loaded
+
+    def _refresh_loaded(self):
+        """Rafraîchir la liste des modèles chargés sans bloquer la répartition"""
+        if time.monotonic() - self._loaded_at > self.ps_interval and (self._ps_task is None or self._ps_task.done()):
+            self._ps_task = asyncio.create_task(self.loaded_models())
+
+    def _resident(self, model: str) -> bool:
+        return model == self.active_model or model in self.loaded
+
+    def _next_model(self) -> Optional[str]:
+        """Modèle dont envoyer la prochaine demande, ou None s'il faut attendre"""
+        pending = {model: queue for model, queue in self._queues.items() if queue}
+        if not pending or self.in_flight >= self.num_parallel:
+            return None
+        resident = [model for model in pending if self._resident(model)]
+        cold = [model for model in pending if not self._resident(model)]
+
+        if cold:
+            oldest = min(cold, key=lambda model: pending[model][0][3])
+            starving = time.perf_counter() - pending[oldest][0][3] > self.max_wait or self._streak >= self.max_batch
+            if not resident or starving:
+                # Chargement : seulement une fois les requêtes en cours terminées
+                if self.in_flight:
+                    return None
+                return oldest if starving else max(cold, key=lambda model: len(pending[model]))
+        # Modèles en mémoire : la demande la plus ancienne d'abord
+        return min(resident, key=lambda model: pending[model][0][3])
+
+    async def _run(self):
+        while True:
+            model = self._next_model()
+            if model is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            payload, future, timeout, queued_at = self._queues[model].popleft()
+            if future.done():
+                self._stats["cancelled"] += 1
+                continue
+
+            self._refresh_loaded()
+            if not self._resident(model):
+                if self.active_model is not None:
+                    self._stats["swaps"] += 1
+                self.active_model = model
+                self._streak = 0
+                self._stats["batches"] += 1
+            self._streak += 1
+            self.in_flight += 1
+            self._stats["dispatched"] += 1
+            self._stats["queue_wait_seconds"] += time.perf_counter() - queued_at
+            asyncio.create_task(self._send(model, payload, future, timeout))
+
+    async def _send(self, model: str, payload: Dict[str, Any], future: asyncio.Future, timeout: Optional[float]):
+        try:
+            response = await asyncio.wait_for(
+                self.http.post("/api/generate", json={**payload, "model": model, "keep_alive": self.keep_alive}),
+                timeout=timeout
+            )
+            if response.status_code == 200:
+                self.loaded.add(model)
+                # load_duration (ns) : temps de chargement du modèle pour cette requête
+                if response.json().get("load_duration", 0) / 1e9 > COLD_LOAD_SECONDS:
+                    self._stats["cold_loads"] += 1
+                    # Un chargement peut en avoir évincé un autre : relire /api/ps au prochain envoi
+                    self._loaded_at = 0.0
+            if not future.done():
+                future.set_result(response)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self.in_flight -= 1
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        dispatched = self._stats["dispatched"]
+        return {
+            **self._stats,
+            "queue_wait_seconds": round(self._stats["queue_wait_seconds"], 3),
+            "avg_batch_size": dispatched / self._stats["batches"] if self._stats["batches"] else 0.0,
+            "queued": {model: len(queue) for model, queue in self._queues.items() if queue},
+            "in_flight": self.in_flight,
+            "active_model": self.active_model,
+            "loaded_models": sorted(self.loaded),
+            "num_parallel": self.num_parallel,
+            "keep_alive": self.keep_alive
+        }
+
+    async def aclose(self):
+        if self._ps_task:
+            self._ps_task.cancel()
+        if self._worker and self._loop is asyncio.get_running_loop():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        for queue in self._queues.values():
+            for _, future, _, _ in queue:
+                if not future.done():
+                    future.cancel()
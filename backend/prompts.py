@@ -0,0 +1,132 @@
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Consignes fixes du message système Azure : identiques d'un appel à l'autre
+SYSTEM_PROMPT = (
+    "You are playing Tic-Tac-Toe on a 10x10 grid. "
+    "The victory condition is to line up 5 identical elements horizontally, vertically or diagonally. "
+    "If your opponent is about to win, you should block these potentially winning moves. "
+    "CRITICAL: Your response must be ONLY two numbers separated by a comma (row,column). "
+    "No explanations, no sentences, just the coordinates like '3,7'."
+)
+
+# Représentations du plateau proposées aux modèles :
+# - ascii  : grille encadrée avec numéros de colonnes (prompt Ollama historique)
+# - grid   : une ligne par rangée, cases séparées par des espaces (prompt Azure historique)
+# - rows   : une ligne par rangée, sans séparateur
+# - stones : uniquement les coordonnées des pierres posées
+ENCODINGS = ("ascii", "grid", "rows", "stones")
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d{1,3}|([^\sA-Za-z\d])\1{0,3}")
+
+def _symbol(cell: str) -> str:
+    return "." if cell == " " else cell
+
+# Les rangées sont mises en forme une à une et mémorisées : d'un coup au
+# suivant une seule rangée change, les autres sont reprises telles quelles.
+@lru_cache(maxsize=8192)
+def _ascii_row(index: int, row: Tuple[str, ...]) -> str:
+    return f"{index} |" + "".join(f" {_symbol(cell)}" for cell in row) + " |"
+
+@lru_cache(maxsize=8192)
+def _grid_row(index: int, row: Tuple[str, ...]) -> str:
+    return f"{index}: " + " ".join(_symbol(cell) for cell in row)
+
+@lru_cache(maxsize=8192)
+def _compact_row(index: int, row: Tuple[str, ...]) -> str:
+    return f"{index}:" + "".join(_symbol(cell) for cell in row)
+
+@lru_cache(maxsize=8192)
+def _row_stones(index: int, row: Tuple[str, ...]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    return (tuple(f"{index},{j}" for j, cell in enumerate(row) if cell == "X"),
+            tuple(f"{index},{j}" for j, cell in enumerate(row) if cell == "O"))
+
+def encode_board(grid: Sequence[Sequence[str]], encoding: str = "ascii") -> str:
+    """Représentation texte du plateau dans l'encodage demandé"""
+    rows = [tuple(row) for row in grid]
+    size = len(rows[0]) if rows else 0
+    if encoding == "ascii":
+        border = "  +" + "-" * (2 * size - 1) + "+"
+        lines = ["   " + " ".join(str(j) for j in range(size)), border]
+        lines += [_ascii_row(i, row) for i, row in enumerate(rows)]
+        return "\n".join(lines + [border]) + "\n"
+    if encoding == "grid":
+        return "\n".join(_grid_row(i, row) for i, row in enumerate(rows))
+    if encoding == "rows":
+        return "\n".join(_compact_row(i, row) for i, row in enumerate(rows))
+    if encoding == "stones":
+        x: List[str] = []
+        o: List[str] = []
+        for i, row in enumerate(rows):
+            row_x, row_o = _row_stones(i, row)
+            x += row_x
+            o += row_o
+        return f"{len(rows)}x{size} board, empty cells not listed.\nX: {' '.join(x) or 'none'}\nO: {' '.join(o) or 'none'}"
+    raise ValueError(f"Encodage inconnu: {encoding} (attendu: {', '.join(ENCODINGS)})")
+
+def estimate_tokens(text: str) -> int:
+    """Estimation du nombre de jetons : mots par 4 lettres, nombres par 3 chiffres,
+    ponctuation répétée par 4 signes (".....")"""
+    return sum((len(m.group()) + 3) // 4 if m.group()[0].isalpha() else 1 for m in _TOKEN_RE.finditer(text))
+
+def default_encoding(backend: str) -> str:
+    """Encodage par défaut : PROMPT_ENCODING, sinon le format historique du backend"""
+    return os.getenv("PROMPT_ENCODING") or ("grid" if backend == "azure" else "ascii")
+
+def build_ollama_prompt(grid: Sequence[Sequence[str]], player: str, available_cells: list, attempt: int,
+                        encoding: str = "ascii") -> str:
+    """Prompt d'un modèle local ; chaque nouvelle tentative est plus directive"""
+    if attempt >= 2:
+        return f"Player {player}, give two numbers (row, column): "
+    board = encode_board(grid, encoding)
+    if not board.endswith("\n"):
+        board += "\n"
+    if attempt == 0:
+        return f"{board}Player {player}, available cells: {available_cells}. Answer: row,column"
+    return f"{board}Player {player}, answer ONLY: row,column (e.g. 3,5)"
+
+def build_azure_prompt(grid: Sequence[Sequence[str]], player: str, encoding: str = "grid",
+                       history: Optional[list] = None) -> str:
+    """Message utilisateur Azure
+
+    L'encodage "grid" (défaut) reproduit à l'identique le prompt historique ;
+    les autres encodages utilisent un message court, les consignes étant
+    déjà dans SYSTEM_PROMPT.
+    """
+    if encoding == "grid":
+        history_text = ""
+        if history:
+            history_text = "Historique des coups précédents :\n" + "\n".join(
+                [f"Tour {i+1}: Joueur {p} -> {r},{c}" for i, (p, r, c) in enumerate(history)]
+            ) + "\n\n"
+        return (
+            f"{history_text}"
+            f"Current 10x10 grid (rows 0-9, columns 0-9) :\n{encode_board(grid, encoding)}\n\n"
+            f"Player '{player}' is playing a Tic-Tac-Toe game. "
+            "The goal is to line up 5 identical symbols. "
+            "If the opponent is about to win, block them immediately. "
+            "IMPORTANT: Respond with ONLY the coordinates in format 'row,column' (e.g. '3,7'). "
+            "Do not add any explanation or text. Just the coordinates."
+        )
+    history_text = ""
+    if history:
+        history_text = "Previous moves:\n" + "\n".join(
+            f"Turn {i+1}: {p} -> {r},{c}" for i, (p, r, c) in enumerate(history)
+        ) + "\n\n"
+    return f"{history_text}{encode_board(grid, encoding)}\n\nPlayer '{player}' to move. Answer: row,column"
+
+def compare_encodings(grid: Sequence[Sequence[str]], player: str = "X") -> Dict[str, Dict[str, int]]:
+    """Taille du premier prompt Ollama et du prompt Azure pour chaque encodage"""
+    empty_cells = [(i, j) for i, row in enumerate(grid) for j, cell in enumerate(row) if cell == " "][:8]
+    report = {}
+    for encoding in ENCODINGS:
+        ollama = build_ollama_prompt(grid, player, empty_cells, 0, encoding)
+        azure = build_azure_prompt(grid, player, encoding)
+        report[encoding] = {
+            "ollama_chars": len(ollama),
+            "ollama_tokens": estimate_tokens(ollama),
+            "azure_tokens": estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(azure)
+        }
+    return report
@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ratings (
+    model TEXT PRIMARY KEY,
+    rating REAL NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+class RatingService:
+    """Classement Elo des modèles, mis à jour à chaque partie journalisée
+
+    Chaque partie ne modifie que les deux lignes des modèles concernés (O(1)).
+    SQLite fait foi : les lignes sont relues et réécrites dans la même
+    transaction (BEGIN IMMEDIATE), si bien qu'un autre processus qui met à jour
+    le classement en même temps ne perd pas ses parties.
+    """
+
+    def __init__(self, path: str, k_factor: float = 32.0, initial_rating: float = 1500.0, busy_timeout: float = 5.0):
+        self.path = Path(path)
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self._lock = threading.Lock()
+        # isolation_level=None : transactions explicites (BEGIN IMMEDIATE) uniquement
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=busy_timeout, isolation_level=None)
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def _load(self, models: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        models = list(models)
+        if not models:
+            return {}
+        placeholders = ", ".join("?" * len(models))
+        return {
+            row[0]: {"rating": row[1], "games": row[2], "wins": row[3], "losses": row[4], "draws": row[5]}
+            for row in self._conn.execute(
+                f"SELECT model, rating, games, wins, losses, draws FROM ratings WHERE model IN ({placeholders})", models
+            )
+        }
+
+    def _apply(self, ratings: Dict[str, Dict[str, Any]], game: Dict[str, Any]):
+        """Mettre à jour ratings (modèle -> ligne) avec le résultat d'une partie"""
+        model_x, model_o = game.get("model_x"), game.get("model_o")
+        if not model_x or not model_o or model_x == model_o:
+            return
+
+        new_entry = {"rating": self.initial_rating, "games": 0, "wins": 0, "losses": 0, "draws": 0}
+        x = ratings.setdefault(model_x, dict(new_entry))
+        o = ratings.setdefault(model_o, dict(new_entry))
+        expected_x = 1 / (1 + 10 ** ((o["rating"] - x["rating"]) / 400))
+        winner = game.get("winner")
+        score_x = 1.0 if winner == "X" else 0.0 if winner == "O" else 0.5
+
+        delta = self.k_factor * (score_x - expected_x)
+        x["rating"] += delta
+        o["rating"] -= delta
+        for entry, score in ((x, score_x), (o, 1 - score_x)):
+            entry["games"] += 1
+            if score == 1.0:
+                entry["wins"] += 1
+            elif score == 0.0:
+                entry["losses"] += 1
+            else:
+                entry["draws"] += 1
+
+    def _persist(self, ratings: Dict[str, Dict[str, Any]]):
+        now = datetime.now().isoformat()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO ratings (model, rating, games, wins, losses, draws, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(model, e["rating"], e["games"], e["wins"], e["losses"], e["draws"], now) for model, e in ratings.items()]
+        )
+
+    def _transaction(self, work: Callable[[], Any]) -> Any:
+        """Exécuter work sous BEGIN IMMEDIATE : verrou d'écriture pris avant la lecture"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def update(self, games: List[Dict[str, Any]]):
+        """Prendre en compte un lot de parties terminées"""
+        models = {game.get(key) for game in games for key in ("model_x", "model_o")} - {None, ""}
+        if not models:
+            return
+
+        def work():
+            ratings = self._load(models)
+            for game in games:
+                self._apply(ratings, game)
+            self._persist(ratings)
+
+        self._transaction(work)
+
+    def rebuild(self, games: Iterable[Dict[str, Any]]) -> int:
+        """Recalculer tout le classement en un seul passage sur l'historique"""
+        ratings: Dict[str, Dict[str, Any]] = {}
+        count = 0
+        for game in games:
+            self._apply(ratings, game)
+            count += 1
+
+        def work():
+            self._conn.execute("DELETE FROM ratings")
+            self._persist(ratings)
+
+        self._transaction(work)
+        return count
+
+    def leaderboard(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT model, rating, games, wins, losses, draws FROM ratings ORDER BY rating DESC"
+            ).fetchall()
+        return [
+            {"model": model, "rating": round(rating, 1), "games": games, "wins": wins, "losses": losses, "draws": draws}
+            for model, rating, games, wins, losses, draws in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,4 @@
+from dotenv import load_dotenv
+
+# Chargé une seule fois, au premier import, par les modules qui lisent l'environnement
+load_dotenv()
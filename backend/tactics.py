@@ -0,0 +1,183 @@
+from typing import List, Optional, Tuple
+
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+WIN_SCORE = 1_000_000
+
+# Score d'un alignement selon sa longueur et son nombre d'extrémités libres
+PATTERN_SCORES = {
+    (4, 2): 100_000,  # quatre ouvert : victoire assurée au coup suivant
+    (4, 1): 10_000,
+    (3, 2): 5_000,    # trois ouvert : menace à bloquer
+    (3, 1): 500,
+    (2, 2): 200,
+    (2, 1): 50,
+    (1, 2): 10,
+    (1, 1): 2,
+}
+
+class TacticalEngine:
+    """Moteur tactique local (style gomoku) pour les coups de secours et comme adversaire de référence
+
+    Ordre de décision : gagner tout de suite, bloquer une victoire adverse, puis
+    meilleur coup selon une évaluation des menaces (quatre/trois ouverts, en
+    attaque comme en défense). Avec depth > 0, une recherche alpha-beta limitée
+    aux `width` meilleurs coups candidats départage les coups.
+    """
+
+    def __init__(self, win_length: int = 5, depth: int = 0, width: int = 8, radius: int = 2):
+        self.win_length = win_length
+        self.depth = depth
+        self.width = width
+        self.radius = radius
+
+    def best_move(self, grid: List[List[str]], player: str, depth: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """Choisir un coup pour `player`, ou None si la grille est pleine"""
+        depth = self.depth if depth is None else depth
+        opponent = "O" if player == "X" else "X"
+        size = len(grid)
+        candidates = self._candidates(grid)
+        if not candidates:
+            if all(cell != " " for row in grid for cell in row):
+                return None
+            return (size // 2, size // 2) if grid[size // 2][size // 2] == " " else self._first_empty(grid)
+
+        # Gagner, sinon bloquer
+        for who in (player, opponent):
+            for r, c in candidates:
+                if self._line_length_through(grid, r, c, who) >= self.win_length:
+                    return (r, c)
+
+        ordered = self._ordered(grid, candidates, player, opponent)
+        if depth <= 0 or len(ordered) == 1:
+            return ordered[0]
+
+        # Copie de travail : la recherche joue et annule les coups en place
+        work = [row[:] for row in grid]
+        best, best_value, alpha = ordered[0], -float("inf"), -float("inf")
+        for r, c in ordered[:self.width]:
+            work[r][c] = player
+            value = -self._negamax(work, opponent, player, depth - 1, -float("inf"), -alpha)
+            work[r][c] = " "
+            if value > best_value:
+                best, best_value = (r, c), value
+            alpha = max(alpha, value)
+        return best
+
+    def _negamax(self, grid: List[List[str]], player: str, opponent: str, depth: int, alpha: float, beta: float) -> float:
+        candidates = self._candidates(grid)
+        if not candidates:
+            return 0
+        for r, c in candidates:
+            if self._line_length_through(grid, r, c, player) >= self.win_length:
+                return WIN_SCORE
+        if depth <= 0:
+            return self._evaluate(grid, player, opponent)
+
+        best = -float("inf")
+        for r, c in self._ordered(grid, candidates, player, opponent)[:self.width]:
+            grid[r][c] = player
+            value = -self._negamax(grid, opponent, player, depth - 1, -beta, -alpha)
+            grid[r][c] = " "
+            best = max(best, value)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+        return best
+
+    def _evaluate(self, grid: List[List[str]], player: str, opponent: str) -> float:
+        """Évaluation statique du point de vue du joueur qui a le trait"""
+        mine = self._patterns(grid, player)
+        theirs = self._patterns(grid, opponent)
+        # Pas de victoire immédiate pour le trait (vérifiée avant) : un quatre
+        # ouvert ou deux quatres adverses ne peuvent plus être bloqués
+        if theirs.get((4, 2), 0) or theirs.get((4, 1), 0) >= 2:
+            return -WIN_SCORE / 2
+        # Un trois ouvert avec le trait devient un quatre ouvert si l'adversaire n'a pas de quatre
+        if mine.get((3, 2), 0) and not theirs.get((4, 1), 0):
+            return WIN_SCORE / 4
+        score = sum(PATTERN_SCORES.get(key, 0) * n for key, n in mine.items())
+        score -= sum(PATTERN_SCORES.get(key, 0) * n for key, n in theirs.items())
+        return score
+
+    def _patterns(self, grid: List[List[str]], player: str) -> dict:
+        """Nombre d'alignements de `player` par (longueur, extrémités libres)"""
+        size = len(grid)
+        counts: dict = {}
+        for dr, dc in DIRECTIONS:
+            for r in range(size):
+                for c in range(size):
+                    if grid[r][c] != player:
+                        continue
+                    pr, pc = r - dr, c - dc
+                    before_inside = 0 <= pr < size and 0 <= pc < size
+                    if before_inside and grid[pr][pc] == player:
+                        continue  # pas le début de l'alignement
+                    length, nr, nc = 0, r, c
+                    while 0 <= nr < size and 0 <= nc < size and grid[nr][nc] == player:
+                        length += 1
+                        nr, nc = nr + dr, nc + dc
+                    open_ends = (before_inside and grid[pr][pc] == " ") + (0 <= nr < size and 0 <= nc < size and grid[nr][nc] == " ")
+                    if open_ends:
+                        key = (min(length, 4), open_ends)
+                        counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def _ordered(self, grid: List[List[str]], candidates: List[Tuple[int, int]], player: str, opponent: str) -> List[Tuple[int, int]]:
+        """Candidats triés par intérêt : attaque + défense (bloquer le motif adverse)"""
+        center = (len(grid) - 1) / 2
+        scored = []
+        for r, c in candidates:
+            score = self._attack_score(grid, r, c, player) + 0.9 * self._attack_score(grid, r, c, opponent)
+            # Départager les égalités en faveur du centre
+            scored.append((score - 0.01 * (abs(r - center) + abs(c - center)), (r, c)))
+        scored.sort(reverse=True)
+        return [cell for _, cell in scored]
+
+    def _attack_score(self, grid: List[List[str]], row: int, col: int, player: str) -> int:
+        """Valeur des alignements que `player` obtiendrait en jouant (row, col)"""
+        size = len(grid)
+        total = 0
+        for dr, dc in DIRECTIONS:
+            count, open_ends = 1, 0
+            for sign in (1, -1):
+                r, c = row + sign * dr, col + sign * dc
+                while 0 <= r < size and 0 <= c < size and grid[r][c] == player:
+                    count += 1
+                    r, c = r + sign * dr, c + sign * dc
+                if 0 <= r < size and 0 <= c < size and grid[r][c] == " ":
+                    open_ends += 1
+            if count >= self.win_length:
+                return WIN_SCORE
+            total += PATTERN_SCORES.get((count, open_ends), 0)
+        return total
+
+    def _line_length_through(self, grid: List[List[str]], row: int, col: int, player: str) -> int:
+        """Plus long alignement de `player` passant par (row, col) s'il y jouait"""
+        size = len(grid)
+        longest = 0
+        for dr, dc in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                r, c = row + sign * dr, col + sign * dc
+                while 0 <= r < size and 0 <= c < size and grid[r][c] == player:
+                    count += 1
+                    r, c = r + sign * dr, c + sign * dc
+            longest = max(longest, count)
+        return longest
+
+    def _candidates(self, grid: List[List[str]]) -> List[Tuple[int, int]]:
+        """Cases vides à distance <= radius d'un pion déjà posé"""
+        size = len(grid)
+        seen = set()
+        for r in range(size):
+            for c in range(size):
+                if grid[r][c] == " ":
+                    continue
+                for nr in range(max(0, r - self.radius), min(size, r + self.radius + 1)):
+                    for nc in range(max(0, c - self.radius), min(size, c + self.radius + 1)):
+                        if grid[nr][nc] == " ":
+                            seen.add((nr, nc))
+        return sorted(seen)
+
+    def _first_empty(self, grid: List[List[str]]) -> Tuple[int, int]:
+        return next((r, c) for r, row in enumerate(grid) for c, cell in enumerate(row) if cell == " ")
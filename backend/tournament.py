@@ -0,0 +1,322 @@
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from game_engine import GameEngine
+from game_logger import GameLogger, build_move_record
+from llm_client import LLMClient
+from metrics import ENGINE_SECONDS, summarize_moves
+from prompts import ENCODINGS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODES = ("round_robin", "pairs")
+
+
+def model_backend(model: str) -> str:
+    """Backend qui sert un modèle : 'azure', 'engine' (moteur local) ou 'ollama'"""
+    if model.startswith("azure:"):
+        return "azure"
+    if model.startswith("engine:"):
+        return "engine"
+    return "ollama"
+
+
+def schedule(models: List[str], games_per_pair: int = 1, mode: str = "round_robin") -> List[Tuple[str, str]]:
+    """Construire la liste des rencontres (model_x, model_o)
+
+    - round_robin : chaque paire ordonnée joue games_per_pair parties,
+      chaque modèle joue donc autant de fois avec X qu'avec O
+    - pairs : games_per_pair parties par paire, en alternant les couleurs
+    """
+    if mode not in MODES:
+        raise ValueError(f"Mode inconnu: {mode} (attendu: {', '.join(MODES)})")
+
+    matchups = []
+    for a, b in itertools.combinations(models, 2):
+        if mode == "round_robin":
+            matchups += [(a, b), (b, a)] * games_per_pair
+        else:
+            matchups += [(a, b) if i % 2 == 0 else (b, a) for i in range(games_per_pair)]
+    return matchups
+
+
+def order_by_affinity(matchups: List[Tuple[str, str]], loaded: Iterable[str] = ()) -> List[Tuple[str, str]]:
+    """Réordonner les rencontres pour enchaîner celles qui utilisent les mêmes modèles Ollama
+
+    Les parties d'une même paire de modèles se suivent ; la paire suivante est
+    celle qui partage le plus de modèles avec ceux en mémoire (loaded, puis la
+    paire précédente). Les parties sans modèle Ollama passent en dernier.
+    """
+    groups: Dict[frozenset, List[Tuple[str, str]]] = {}
+    for model_x, model_o in matchups:
+        key = frozenset(model for model in (model_x, model_o) if model_backend(model) == "ollama")
+        groups.setdefault(key, []).append((model_x, model_o))
+    others = groups.pop(frozenset(), [])
+
+    ordered: List[Tuple[str, str]] = []
+    resident = frozenset(loaded)
+    while groups:
+        key = max(groups, key=lambda k: (len(k & resident), -len(k - resident)))
+        ordered += groups.pop(key)
+        resident = key
+    return ordered + others
+
+
+class Tournament:
+    """Tournoi headless : joue de nombreuses parties en parallèle et les journalise"""
+
+    def __init__(self, llm_client: LLMClient, game_engine: GameEngine, game_logger: GameLogger,
+                 concurrency: Optional[Dict[str, int]] = None, max_parallel_games: int = 16,
+                 on_result: Optional[Callable[[Dict[str, Any]], None]] = None, use_move_cache: bool = True,
+                 on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None, prompt_encoding: Optional[str] = None,
+                 affinity: bool = True, max_resident_models: Optional[int] = None):
+        if prompt_encoding and prompt_encoding not in ENCODINGS:
+            raise ValueError(f"Encodage inconnu: {prompt_encoding} (attendu: {', '.join(ENCODINGS)})")
+        self.tournament_id = str(uuid.uuid4())
+        self.llm_client = llm_client
+        self.game_engine = game_engine
+        self.game_logger = game_logger
+        self.on_result = on_result
+        # Appelé à chaque début de partie et à chaque coup (spectateurs)
+        self.on_event = on_event
+        self.use_move_cache = use_move_cache
+        # None : encodage par défaut de chaque backend (prompts.default_encoding)
+        self.prompt_encoding = prompt_encoding
+        # Ordonner les parties pour limiter les changements de modèle côté Ollama, et
+        # ne jouer en même temps que des parties tenant dans max_resident_models modèles
+        self.affinity = affinity
+        self.max_resident_models = max_resident_models or int(os.getenv("OLLAMA_MAX_LOADED_MODELS", "2"))
+        self._models_in_use: Counter = Counter()
+        self._models_changed = asyncio.Condition()
+        concurrency = concurrency or {}
+        # Nombre maximal de requêtes LLM simultanées par backend. Pour Ollama il s'agit
+        # des demandes en file : le parallélisme réel est réglé par OllamaScheduler
+        self.limits = {
+            "ollama": asyncio.Semaphore(concurrency.get("ollama", 16)),
+            "azure": asyncio.Semaphore(concurrency.get("azure", 8)),
+            "engine": asyncio.Semaphore(concurrency.get("engine", 4)),
+        }
+        self.games_slot = asyncio.Semaphore(max_parallel_games)
+
+        self.status = "pending"
+        self.total = 0
+        self.results: List[Dict[str, Any]] = []
+        self.errors: List[Dict[str, Any]] = []
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        # Parties en cours : game_id -> {"board", "current_player", "model_x", "model_o"}
+        self.live: Dict[str, Dict[str, Any]] = {}
+        self._scheduler_start: Dict[str, Any] = {}
+
+    def _emit(self, game_id: str, event: Dict[str, Any]):
+        if self.on_event:
+            self.on_event(game_id, {"tournament_id": self.tournament_id, **event})
+
+    async def play_game(self, model_x: str, model_o: str) -> Dict[str, Any]:
+        """Jouer une partie complète entre deux modèles"""
+        game_id = str(uuid.uuid4())
+        board = self.game_engine.new_board()
+        player = "X"
+        winner = None
+        moves = []
+        start_time = time.time()
+        live = self.live[game_id] = {"board": board, "current_player": player, "model_x": model_x, "model_o": model_o}
+        self._emit(game_id, {"type": "start", "model_x": model_x, "model_o": model_o, "current_player": player})
+
+        try:
+            while not board.is_full():
+                model = model_x if player == "X" else model_o
+                async with self.limits[model_backend(model)]:
+                    move_result = await self.llm_client.ask_move(
+                        board.to_grid(), player, model, use_cache=self.use_move_cache, encoding=self.prompt_encoding
+                    )
+                if not move_result.get("valid", False):
+                    raise RuntimeError(f"Coup invalide de {model}: {move_result}")
+
+                with ENGINE_SECONDS.time(operation="play"):
+                    board = board.play(move_result['row'], move_result['col'], player)
+                    won = board.has_won(player)
+                moves.append(build_move_record(player, model, move_result))
+                if won:
+                    winner = player
+                next_player = "O" if player == "X" else "X"
+                game_over = won or board.is_full()
+                live.update(board=board, current_player=next_player)
+                self._emit(game_id, {
+                    "type": "move",
+                    "move": {"row": move_result['row'], "col": move_result['col'], "player": player},
+                    "winner": winner,
+                    "current_player": next_player,
+                    "move_count": board.move_count,
+                    "game_over": game_over
+                })
+                if won:
+                    break
+                player = next_player
+        except Exception as e:
+            self._emit(game_id, {"type": "error", "detail": str(e), "game_over": True})
+            raise
+        finally:
+            del self.live[game_id]
+
+        return {
+            "game_id": game_id,
+            "tournament_id": self.tournament_id,
+            "winner": winner,
+            "start_time": start_time,
+            "end_time": time.time(),
+            "duration_seconds": time.time() - start_time,
+            "model_x": model_x,
+            "model_o": model_o,
+            "move_count": len(moves),
+            "final_grid": board.to_grid(),
+            "moves": moves,
+            "metrics": summarize_moves(moves)
+        }
+
+    async def _admit(self, models: frozenset):
+        """Attendre que les modèles de la partie tiennent avec ceux des parties en cours"""
+        async with self._models_changed:
+            await self._models_changed.wait_for(
+                lambda: not self._models_in_use or len(models | set(self._models_in_use)) <= self.max_resident_models
+            )
+            self._models_in_use.update(models)
+
+    async def _release(self, models: frozenset):
+        async with self._models_changed:
+            self._models_in_use.subtract(models)
+            self._models_in_use += Counter()  # retirer les compteurs à zéro
+            self._models_changed.notify_all()
+
+    async def _run_one(self, model_x: str, model_o: str):
+        models = frozenset(model for model in (model_x, model_o) if model_backend(model) == "ollama")
+        if self.affinity and models:
+            await self._admit(models)
+        try:
+            async with self.games_slot:
+                game_data = await self.play_game(model_x, model_o)
+        except Exception as e:
+            logger.error(f"Partie {model_x} vs {model_o} interrompue: {e}")
+            self.errors.append({"model_x": model_x, "model_o": model_o, "error": str(e)})
+            return
+        finally:
+            if self.affinity and models:
+                await self._release(models)
+
+        self.game_logger.log_game(game_data)
+        result = {key: game_data[key] for key in ("game_id", "model_x", "model_o", "winner", "move_count", "duration_seconds")}
+        self.results.append(result)
+        if self.on_result:
+            self.on_result(result)
+
+    async def run(self, matchups: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """Jouer toutes les rencontres, au plus max_parallel_games à la fois"""
+        self.status = "running"
+        self.total = len(matchups)
+        self.start_time = time.time()
+        scheduler = self.llm_client.scheduler
+        if self.affinity and any(model_backend(model) == "ollama" for matchup in matchups for model in matchup):
+            matchups = order_by_affinity(matchups, await scheduler.loaded_models(max_age=0))
+        self._scheduler_start = scheduler.stats()
+        logger.info(f"Tournoi {self.tournament_id}: {self.total} parties")
+        try:
+            await asyncio.gather(*(self._run_one(x, o) for x, o in matchups))
+            self.status = "finished"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            raise
+        finally:
+            self.end_time = time.time()
+        return self.summary()
+
+    def standings(self) -> List[Dict[str, Any]]:
+        """Classement par nombre de victoires"""
+        table: Dict[str, Dict[str, int]] = {}
+        for result in self.results:
+            for color, model in (("X", result["model_x"]), ("O", result["model_o"])):
+                row = table.setdefault(model, {"games": 0, "wins": 0, "losses": 0, "draws": 0})
+                row["games"] += 1
+                if result["winner"] is None:
+                    row["draws"] += 1
+                elif result["winner"] == color:
+                    row["wins"] += 1
+                else:
+                    row["losses"] += 1
+        return sorted(({"model": model, **row} for model, row in table.items()),
+                      key=lambda row: (row["wins"], row["draws"]), reverse=True)
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = ((self.end_time or time.time()) - self.start_time) if self.start_time else 0.0
+        return {
+            "tournament_id": self.tournament_id,
+            "status": self.status,
+            "total": self.total,
+            "completed": len(self.results),
+            "errors": len(self.errors),
+            "elapsed_seconds": elapsed,
+            "games_per_minute": len(self.results) / elapsed * 60 if elapsed else 0.0,
+            **self.model_swaps(),
+            "standings": self.standings()
+        }
+
+    def model_swaps(self) -> Dict[str, int]:
+        """Changements de modèle Ollama depuis le début du tournoi (planificateur partagé)"""
+        if not self._scheduler_start:
+            return {"model_swaps": 0, "cold_loads": 0}
+        stats = self.llm_client.scheduler.stats()
+        return {
+            "model_swaps": stats["swaps"] - self._scheduler_start["swaps"],
+            "cold_loads": stats["cold_loads"] - self._scheduler_start["cold_loads"]
+        }
+
+
+async def _main(args: argparse.Namespace):
+    llm_client = LLMClient()
+    game_logger = GameLogger(args.log_dir)
+    try:
+        models = args.models or await llm_client.get_available_models()
+        if len(models) < 2:
+            raise SystemExit("Il faut au moins deux modèles pour un tournoi")
+
+        tournament = Tournament(
+            llm_client, GameEngine(), game_logger,
+            concurrency={"ollama": args.ollama_concurrency, "azure": args.azure_concurrency},
+            max_parallel_games=args.max_parallel_games,
+            use_move_cache=not args.no_move_cache,
+            prompt_encoding=args.prompt_encoding,
+            affinity=not args.no_affinity,
+            on_result=lambda r: logger.info(f"{r['model_x']} vs {r['model_o']}: {r['winner'] or 'nul'} en {r['move_count']} coups"),
+        )
+        summary = await tournament.run(schedule(models, args.games_per_pair, args.mode))
+    finally:
+        await llm_client.aclose()
+        game_logger.close()
+
+    print(f"\n{summary['completed']}/{summary['total']} parties ({summary['errors']} erreurs) "
+          f"en {summary['elapsed_seconds']:.1f}s, {summary['model_swaps']} changements de modèle "
+          f"({summary['cold_loads']} chargements)")
+    for row in summary["standings"]:
+        print(f"{row['model']:<30} V {row['wins']:>4}  D {row['losses']:>4}  N {row['draws']:>4}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tournoi LLM headless")
+    parser.add_argument("--models", nargs="*", help="Modèles participants (par défaut : tous les modèles disponibles)")
+    parser.add_argument("--mode", choices=MODES, default="round_robin")
+    parser.add_argument("--games-per-pair", type=int, default=1)
+    parser.add_argument("--ollama-concurrency", type=int, default=16)
+    parser.add_argument("--azure-concurrency", type=int, default=8)
+    parser.add_argument("--max-parallel-games", type=int, default=16)
+    parser.add_argument("--no-move-cache", action="store_true", help="Ignorer le cache de coups (échantillons frais)")
+    parser.add_argument("--prompt-encoding", choices=ENCODINGS, help="Représentation du plateau dans les prompts")
+    parser.add_argument("--no-affinity", action="store_true", help="Garder l'ordre des rencontres (pas de regroupement par modèle)")
+    parser.add_argument("--log-dir", default="game_logs")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,83 @@
+"""Temps d'import du backend (démarrage à froid d'un worker)
+
+Chaque mesure se fait dans un processus neuf : python -c "import api".
+
+    python benchmarks/startup_benchmark.py --runs 5 --budget 1.0
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Modules du backend importables depuis un dossier temporaire (journaux jetables)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND), env.get("PYTHONPATH")]))
+    # Pas de préchauffage ni d'appel réseau pendant la mesure
+    env["WARMUP_ON_STARTUP"] = "0"
+    env.setdefault("GAME_STATE_STORE", "memory")
+    return env
+
+def time_import(module: str, cwd: Path, env: Dict[str, str]) -> float:
+    """Durée (s) de l'import de module dans un nouvel interpréteur"""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - start)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def top_imports(module: str, cwd: Path, env: Dict[str, str], limit: int = 10) -> List[Tuple[str, float]]:
+    """Paquets de premier niveau les plus coûteux d'après -X importtime (cumulé, s)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    totals: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        # Imports directs du module mesuré : indentation de 3 (le module lui-même : 1)
+        if len(name) - len(name.lstrip()) == 3:
+            top = name.strip().split(".")[0]
+            totals[top] = totals.get(top, 0.0) + int(parts[1]) / 1e6
+    return sorted(totals.items(), key=lambda item: -item[1])[:limit]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Mesurer le temps d'import du backend")
+    parser.add_argument("--module", default="api")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, help="Temps médian maximal (s) ; code de sortie 1 au-delà")
+    parser.add_argument("--top", type=int, default=10, help="Nombre de paquets listés")
+    args = parser.parse_args()
+
+    env = _env()
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        # Premier import : compilation des .pyc, non comptée
+        time_import(args.module, cwd, env)
+        timings = [time_import(args.module, cwd, env) for _ in range(args.runs)]
+        heaviest = top_imports(args.module, cwd, env, args.top)
+
+    median = statistics.median(timings)
+    print(f"import {args.module}: médiane {median * 1000:.0f} ms "
+          f"(min {min(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms, {args.runs} essais)")
+    print("\nPaquets les plus coûteux (cumulé) :")
+    for name, seconds in heaviest:
+        print(f"  {name:<24} {seconds * 1000:>7.0f} ms")
+
+    if args.budget is not None and median > args.budget:
+        print(f"\nBudget dépassé : {median:.3f}s > {args.budget:.3f}s")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
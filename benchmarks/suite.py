@@ -0,0 +1,376 @@
+"""Suite de benchmarks : moteur, analyse des réponses, API, journal, parties complètes
+
+Les appels aux modèles passent par le faux serveur de backend/mock_llm.py,
+monté dans le processus : aucune dépendance réseau, résultats reproductibles.
+
+    python benchmarks/suite.py                    # tout, comparé à baseline.json
+    python benchmarks/suite.py --only engine,parse --quick
+    python benchmarks/suite.py --save-baseline    # enregistrer les résultats comme référence
+
+Les métriques *_per_s sont meilleures quand elles augmentent, *_ms quand elles
+baissent. Chaque benchmark est lancé --repeat fois et chaque métrique est la
+médiane des exécutions. Code de sortie 1 si une métrique se dégrade de plus de
+--tolerance (ou de sa tolérance dans METRIC_TOLERANCES ; p99 n'est pas contrôlé).
+Les références dépendent de la machine : les réenregistrer après un changement d'hôte.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent
+BACKEND = ROOT.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+
+# Avant tout import du backend : pas de cache de coups ni de préchauffage, parallélisme du faux serveur
+os.environ["MOVE_CACHE"] = "0"
+os.environ["WARMUP_ON_STARTUP"] = "0"
+os.environ.setdefault("OLLAMA_NUM_PARALLEL", "4")
+for name in ("AZURE_API_KEY", "AZURE_ENDPOINT"):
+    os.environ.pop(name, None)
+
+# Configuré avant les modules du backend (leur basicConfig n'a alors plus d'effet)
+logging.basicConfig(level=logging.WARNING)
+
+DEFAULT_BASELINE = ROOT / "baseline.json"
+MOCK_MODELS = ["mock-a:1b", "mock-b:1b", "mock-c:1b"]
+
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], Dict[str, float]]] = {}
+# Benchmarks qui répètent eux-mêmes leur mesure (--repeat) au lieu d'être relancés
+SELF_REPEATING = set()
+
+def benchmark(name: str, self_repeating: bool = False):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        if self_repeating:
+            SELF_REPEATING.add(name)
+        return fn
+    return register
+
+def median_metrics(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    """Médiane de chaque métrique sur plusieurs exécutions"""
+    return {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+
+def rate(fn: Callable[[], Any], count: int, repeat: int = 5) -> float:
+    """Opérations par seconde (médiane de repeat passes de count appels)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            fn()
+        timings.append(time.perf_counter() - start)
+    return count / statistics.median(timings)
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def random_grids(count: int, stones: int, seed: int = 0) -> List[List[List[str]]]:
+    """Grilles 10x10 en milieu de partie (stones pierres alternées)"""
+    rng = random.Random(seed)
+    grids = []
+    for _ in range(count):
+        grid = [[" "] * 10 for _ in range(10)]
+        for n, (row, col) in enumerate(rng.sample([(r, c) for r in range(10) for c in range(10)], stones)):
+            grid[row][col] = "X" if n % 2 == 0 else "O"
+        grids.append(grid)
+    return grids
+
+def mock_llm_client(**mock_options):
+    """LLMClient dont les appels Ollama aboutissent au faux serveur, dans le processus"""
+    import httpx
+    from llm_client import LLMClient
+    from mock_llm import MockLLM, create_app
+    from ollama_http import OllamaHTTP
+
+    mock = MockLLM(models=MOCK_MODELS, seed=0, **mock_options)
+    client = LLMClient()
+    client.http = OllamaHTTP(client.ollama_url, transport=httpx.ASGITransport(app=create_app(mock)))
+    client.scheduler.http = client.http
+    return client, mock
+
+@benchmark("engine")
+def bench_engine(args: argparse.Namespace) -> Dict[str, float]:
+    # Chemin chaud de /api/game/move : Board.play puis has_won et is_full
+    from board import Board
+    boards = [Board.from_grid(grid) for grid in random_grids(64, 30)]
+    moves = [(board, *board.empty_cells()[n % 70], "X" if n % 2 else "O") for n, board in enumerate(boards)]
+    full = Board.from_grid([["X" if (r + c) % 2 else "O" for c in range(10)] for r in range(10)])
+    count = 10000 if args.quick else 50000
+    cycle, plays = itertools.cycle(boards), itertools.cycle(moves)
+
+    def play(board, row, col, player):
+        return board.play(row, col, player)
+
+    def move():
+        board, row, col, player = next(plays)
+        board = board.play(row, col, player)
+        return board.has_won(player) or board.is_full()
+
+    return {
+        "play_per_s": rate(lambda: play(*next(plays)), count),
+        "has_won_per_s": rate(lambda: next(cycle).has_won("X"), count),
+        "has_won_full_per_s": rate(lambda: full.has_won("X"), count),
+        "is_full_per_s": rate(lambda: next(cycle).is_full(), count),
+        "move_per_s": rate(move, count),
+    }
+
+@benchmark("parse")
+def bench_parse(args: argparse.Namespace) -> Dict[str, float]:
+    from llm_client import LLMClient
+    from prompts import build_azure_prompt, build_ollama_prompt
+    client = LLMClient()
+    grids = random_grids(64, 30)
+    empty = [(r, c) for r in range(10) for c in range(10) if grids[0][r][c] == " "]
+    responses = ["3,7", " 4, 5 ", "(2, 8)", "Row 1 col 9", "I play 6-6 because", "no idea", "The move is 7 3"]
+    count = 10000 if args.quick else 50000
+    cycle, answers = itertools.cycle(grids), itertools.cycle(responses)
+    return {
+        "parse_response_per_s": rate(lambda: client._parse_response(next(answers), empty), count),
+        "ollama_prompt_per_s": rate(lambda: build_ollama_prompt(next(cycle), "X", empty[:8], 0), count),
+        "azure_prompt_per_s": rate(lambda: build_azure_prompt(next(cycle), "O"), count),
+    }
+
+async def _api_load(games: int, concurrency: int, max_moves: int, rounds: int) -> Dict[str, float]:
+    import httpx
+    import api
+    import llm_client
+    client, mock = mock_llm_client(latency=0.005)
+    # Client partagé remplacé avant le lifespan : api.py le récupère via get_llm_client()
+    await llm_client.close_llm_client()
+    llm_client._llm_client = client
+
+    latencies: List[float] = []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def play(http: httpx.AsyncClient, n: int):
+        nonlocal errors
+        async with slots:
+            response = await http.post("/api/game/start", json={"model_x": MOCK_MODELS[n % 2], "model_o": MOCK_MODELS[n % 2 + 1]})
+            game_id = response.json()["game_id"]
+            for _ in range(max_moves):
+                start = time.perf_counter()
+                response = await http.post("/api/game/move", json={"game_id": game_id})
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+                    break
+                if response.json()["game_over"]:
+                    break
+
+    async def measure(http: httpx.AsyncClient) -> Dict[str, float]:
+        nonlocal errors
+        latencies.clear()
+        errors = 0
+        start = time.perf_counter()
+        await asyncio.gather(*(play(http, n) for n in range(games)))
+        elapsed = time.perf_counter() - start
+        return {
+            "move_p50_ms": percentile(latencies, 0.50) * 1000,
+            "move_p95_ms": percentile(latencies, 0.95) * 1000,
+            "move_p99_ms": percentile(latencies, 0.99) * 1000,
+            "moves_per_s": len(latencies) / elapsed,
+            "move_errors": errors,
+        }
+
+    # Le lifespan ferme le journal et le classement : une seule fois par processus
+    async with api.app.router.lifespan_context(api.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://api") as http:
+            # Une partie hors mesure : premières requêtes, liste des modèles
+            await play(http, 0)
+            return median_metrics([await measure(http) for _ in range(rounds)])
+
+@benchmark("api", self_repeating=True)
+def bench_api(args: argparse.Namespace) -> Dict[str, float]:
+    """/api/game/move sous charge : parties concurrentes contre le faux modèle (5 ms)"""
+    games = 16 if args.quick else 64
+    return asyncio.run(_api_load(games, concurrency=16, max_moves=30, rounds=args.repeat))
+
+def synthetic_game(rng: random.Random) -> Dict[str, Any]:
+    moves = [{
+        "player": "X" if n % 2 == 0 else "O", "row": rng.randrange(10), "col": rng.randrange(10),
+        "model": "mock-a:1b", "latency_ms": rng.uniform(50, 500), "attempts": 1,
+        "tokens": {"prompt": 180, "completion": 4}, "raw_response": "3,4", "fallback": False, "cached": False
+    } for n in range(rng.randrange(9, 40))]
+    return {
+        "game_id": str(uuid.UUID(int=rng.getrandbits(128))), "winner": rng.choice(["X", "O", None]),
+        "start_time": 0.0, "end_time": 1.0, "duration_seconds": 1.0,
+        "model_x": rng.choice(MOCK_MODELS), "model_o": rng.choice(MOCK_MODELS),
+        "move_count": len(moves), "moves": moves, "final_grid": [[" "] * 10 for _ in range(10)]
+    }
+
+@benchmark("logger")
+def bench_logger(args: argparse.Namespace) -> Dict[str, float]:
+    """Écriture puis lecture de 10 000 parties (2 000 en --quick)"""
+    from game_logger import GameLogger
+    count = 2000 if args.quick else 10000
+    rng = random.Random(0)
+    games = [synthetic_game(rng) for _ in range(count)]
+    with tempfile.TemporaryDirectory() as log_dir:
+        game_logger = GameLogger(log_dir)
+        start = time.perf_counter()
+        for game in games:
+            game_logger.log_game(game)
+        submitted = time.perf_counter() - start
+        game_logger.flush()
+        written = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scanned = sum(1 for _ in game_logger.store.iter_games())
+        scan = time.perf_counter() - start
+        recent = rate(lambda: game_logger.get_game_history(50), 20 if args.quick else 100, repeat=3)
+        game_logger.close()
+    return {
+        "log_game_submit_per_s": count / submitted,
+        "log_game_written_per_s": count / written,
+        "iter_games_per_s": scanned / scan,
+        "recent_50_per_s": recent,
+    }
+
+async def _tournament(games_per_pair: int) -> Dict[str, float]:
+    from game_engine import GameEngine
+    from game_logger import GameLogger
+    from tournament import Tournament, schedule
+    client, mock = mock_llm_client(latency=0.0)
+    moves = 0
+
+    def count_moves(result: Dict[str, Any]):
+        nonlocal moves
+        moves += result["move_count"]
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        game_logger = GameLogger(log_dir)
+        tournament = Tournament(client, GameEngine(), game_logger, max_parallel_games=16,
+                                use_move_cache=False, on_result=count_moves)
+        start = time.perf_counter()
+        summary = await tournament.run(schedule(MOCK_MODELS, games_per_pair))
+        elapsed = time.perf_counter() - start
+        await client.aclose()
+        game_logger.close()
+    return {
+        "games_per_s": summary["completed"] / elapsed,
+        "game_moves_per_s": moves / elapsed,
+        "game_errors": summary["errors"],
+    }
+
+@benchmark("games")
+def bench_games(args: argparse.Namespace) -> Dict[str, float]:
+    """Parties complètes (tournoi) entre faux modèles sans latence"""
+    return asyncio.run(_tournament(4 if args.quick else 20))
+
+@benchmark("startup")
+def bench_startup(args: argparse.Namespace) -> Dict[str, float]:
+    from startup_benchmark import _env, time_import
+    env = _env()
+    with tempfile.TemporaryDirectory() as tmp:
+        time_import("api", Path(tmp), env)
+        timings = [time_import("api", Path(tmp), env) for _ in range(3 if args.quick else 5)]
+    return {"import_api_ms": statistics.median(timings) * 1000}
+
+# Tolérances propres aux métriques bruitées ; None : affichée mais hors du contrôle de régression
+# (écarts observés d'une exécution à l'autre sur une même machine : jusqu'à 60 %)
+METRIC_TOLERANCES: Dict[str, Optional[float]] = {
+    "api.move_p99_ms": None,   # queue de distribution : quelques requêtes sur quelques centaines
+    # Opérations de l'ordre de la microseconde : sensibles à la fréquence du processeur
+    "engine.has_won_per_s": 0.5,
+    "engine.has_won_full_per_s": 0.5,
+    "engine.is_full_per_s": 0.5,
+    # Simple mise en file : dépend de l'ordonnancement du thread d'écriture
+    "logger.log_game_submit_per_s": 0.5,
+}
+
+def higher_is_better(metric: str) -> Optional[bool]:
+    if metric.endswith("_per_s"):
+        return True
+    if metric.endswith("_ms"):
+        return False
+    return None  # compteurs (erreurs) : affichés, non comparés
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[Dict[str, Any]]:
+    """Écart de chaque métrique à la référence ; regression=True au-delà de sa tolérance"""
+    rows = []
+    for metric, value in results.items():
+        reference = baseline.get(metric)
+        direction = higher_is_better(metric)
+        limit = METRIC_TOLERANCES.get(metric, tolerance)
+        change = (value - reference) / reference if reference else None
+        regression = bool(change is not None and direction is not None and limit is not None and
+                          (change < -limit if direction else change > limit))
+        rows.append({"metric": metric, "value": value, "baseline": reference, "change": change, "regression": regression})
+    return rows
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks moteur, API et tournoi")
+    parser.add_argument("--only", help=f"Benchmarks à lancer, séparés par des virgules ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--quick", action="store_true", help="Tailles réduites (CI)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistrer les résultats comme référence")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Dégradation tolérée (0.25 = 25 %%)")
+    parser.add_argument("--repeat", type=int, default=3, help="Exécutions de chaque benchmark (médiane par métrique)")
+    parser.add_argument("--json", type=Path, help="Écrire les résultats et la comparaison dans ce fichier")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Benchmarks inconnus: {', '.join(unknown)}")
+
+    baseline_file = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    # Références par mode : les tailles --quick donnent d'autres débits
+    mode = "quick" if args.quick else "full"
+    baseline = baseline_file.get(mode, {})
+
+    results: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        # api.py journalise dans ./game_logs : pas dans le dépôt
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for name in names:
+                start = time.perf_counter()
+                runs = 1 if name in SELF_REPEATING else args.repeat
+                metrics = median_metrics([BENCHMARKS[name](args) for _ in range(runs)])
+                results.update({f"{name}.{metric}": value for metric, value in metrics.items()})
+                print(f"{name}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        finally:
+            os.chdir(cwd)
+
+    rows = compare(results, baseline, args.tolerance)
+    print(f"\n{'métrique':<38} {'valeur':>12} {'référence':>12} {'écart':>8}")
+    for row in rows:
+        reference = f"{row['baseline']:.1f}" if row["baseline"] is not None else "-"
+        change = f"{row['change']:+.1%}" if row["change"] is not None else "-"
+        flag = "  RÉGRESSION" if row["regression"] else "  (hors contrôle)" if METRIC_TOLERANCES.get(row["metric"], 0) is None else ""
+        print(f"{row['metric']:<38} {row['value']:>12.1f} {reference:>12} {change:>8}{flag}")
+
+    if args.json:
+        args.json.write_text(json.dumps({"mode": mode, "results": results, "comparison": rows}, indent=2))
+    if args.save_baseline:
+        baseline_file[mode] = {**baseline, **results}
+        baseline_file.setdefault("machine", {}).update({
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()
+        })
+        args.baseline.write_text(json.dumps(baseline_file, indent=2, sort_keys=True) + "\n")
+        print(f"\nRéférence enregistrée dans {args.baseline}")
+        return 0
+
+    regressions = [row["metric"] for row in rows if row["regression"]]
+    if regressions:
+        print(f"\n{len(regressions)} régression(s) au-delà de {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,35 @@
-from nicegui import ui
-import requests
+from nicegui import background_tasks, ui
+import asyncio
+import html
+import os
+import json
+import time
+import httpx
+import websockets
 import logging
-from typing import List, Optional, Any
+from typing import Any, Dict, List, Optional, Set
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 API_URL = "http://127.0.0.1:8000"
+WS_URL = API_URL.replace("http", "ws", 1)
 ROWS, COLS = 10, 10
 
+# Apparence d'une case selon son contenu : (texte, fond, couleur)
+CELL_STYLES = {
+    "X": ("X", "red", "white"),
+    "O": ("O", "blue", "white"),
+    " ": ("-", "#DEDBD2", "black")
+}
+
+# Tableau de bord : intervalle de rafraîchissement et durée d'affichage d'une partie finie
+DASHBOARD_REFRESH = 0.5
+DASHBOARD_FINISHED_TTL = 15.0
+# Reconnexion des flux WebSocket : délai doublé à chaque échec, jusqu'au maximum
+RECONNECT_DELAY = 1.0
+RECONNECT_MAX_DELAY = 15.0
+
 class TicTacToeApp:
     def __init__(self):
         self.grid: List[List[str]] = [[" " for _ in range(COLS)] for _ in range(ROWS)]
@@ -16,18 +37,20 @@ class TicTacToeApp:
         self.current_player = "X"
         self.current_game_id: Optional[str] = None
         self.auto_mode = False
-        self.auto_timer: Optional[Any] = None
+        self.move_count = 0
+        self.events_task: Optional[asyncio.Task] = None
+        self.http = httpx.AsyncClient(base_url=API_URL, timeout=30.0)
         self.cells: List[List[Optional[ui.label]]] = [[None for _ in range(COLS)] for _ in range(ROWS)]
+        # Contenu actuellement affiché par chaque case (pour n'envoyer que les différences)
+        self.rendered: List[List[str]] = [[" " for _ in range(COLS)] for _ in range(ROWS)]
         self.available_models = []
-        
-        # Récupérer les modèles avant de construire l'UI
-        self.fetch_models()
-        self.setup_ui()
+        self.move_x = 0
+        self.move_y = 0
 
-    def fetch_models(self):
+    async def fetch_models(self):
         """Récupérer les modèles depuis le backend"""
         try:
-            resp = requests.get(f"{API_URL}/api/models")
+            resp = await self.http.get("/api/models")
             resp.raise_for_status()
             self.available_models = resp.json().get("models", ["phi3"])
         except Exception as e:
@@ -91,9 +114,15 @@ class TicTacToeApp:
                         )
                         self.cells[r][c] = lbl
 
-    def init_game(self):
+    async def init_game(self):
         try:
-            resp = requests.post(f"{API_URL}/api/game/start")
+            if self.auto_mode:
+                await self.toggle_auto_mode()
+            resp = await self.http.post("/api/game/start", json={
+                "model_x": self.model_x_input.value,
+                "model_o": self.model_o_input.value
+            })
+            resp.raise_for_status()
             game_data = resp.json()
             
             self.current_game_id = game_data["game_id"]
@@ -112,49 +141,107 @@ class TicTacToeApp:
             self.update_display()
             self.game_id_label.set_text(f"Game ID: {self.current_game_id}")
             logger.info(f"Nouvelle partie initialisée avec ID: {self.current_game_id}")
+
+            # Suivre les coups poussés par le backend
+            if self.events_task:
+                self.events_task.cancel()
+            self.events_task = background_tasks.create(self.listen_events(self.current_game_id))
         except Exception as e:
             logger.error(f"Erreur lors de l'initialisation du jeu: {e}")
             ui.notify(f"Erreur: {e}", color="negative")
 
-    def make_move(self):
+    async def listen_events(self, game_id: str):
+        """Recevoir les événements de la partie par WebSocket, avec reconnexion
+
+        À chaque connexion le backend renvoie l'état complet de la partie ;
+        le flux s'arrête une fois la partie terminée.
+        """
+        delay = RECONNECT_DELAY
+        game_over = False
+        while not game_over and game_id == self.current_game_id:
+            try:
+                async with websockets.connect(f"{WS_URL}/ws/game/{game_id}") as ws:
+                    delay = RECONNECT_DELAY
+                    async for message in ws:
+                        event = json.loads(message)
+                        game_over = game_over or bool(event.get("game_over"))
+                        self.handle_event(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Flux d'événements interrompu ({game_id}): {e}")
+            if not game_over:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def handle_event(self, event: Dict[str, Any]):
+        """Appliquer un événement de partie (coup, état, mode auto, erreur)"""
+        if event.get("game_id") != self.current_game_id:
+            return
+
+        if event["type"] == "state":
+            for r in range(ROWS):
+                for c in range(COLS):
+                    self.grid[r][c] = event["grid"][r][c]
+            self.move_count = event["move_count"]
+            self.current_player = event["current_player"]
+            self.update_display()
+        elif event["type"] == "move":
+            # Un coup peut arriver deux fois (réponse HTTP et WebSocket)
+            if event["move_count"] <= self.move_count:
+                return
+            self.apply_move(event)
+        elif event["type"] == "auto":
+            self.set_auto_button(event["enabled"])
+        elif event["type"] == "error":
+            self.set_auto_button(False)
+            with self.grid_container:
+                ui.notify(f"Erreur: {event.get('detail')}", color="negative")
+
+    def apply_move(self, game_data: Dict[str, Any]):
+        move = game_data["move"]
+        self.grid[move["row"]][move["col"]] = move["player"]
+        self.move_count = game_data["move_count"]
+        if move["player"] == "X":
+            self.move_x += 1
+        else:
+            self.move_y += 1
+        
+        self.current_player = game_data["current_player"]
+        
+        # Gestion du gagnant
+        if game_data.get("winner"):
+            winner = game_data["winner"]
+            self.scores[winner] += 1
+            logger.info(f"Le joueur {winner} a gagné la partie {self.current_game_id}")
+            with self.grid_container:
+                ui.notify(f"Le joueur {winner} a gagné !", color="positive")
+        
+        if game_data.get("game_over"):
+            self.current_game_id = None
+            self.set_auto_button(False)
+        
+        self.update_display()
+
+    async def make_move(self):
         if not self.current_game_id:
             logger.warning("Tentative de jouer sans partie initialisée")
             ui.notify("Démarrez d'abord une partie", color="warning")
             return
 
+        # Une nouvelle partie peut démarrer pendant la requête : la réponse reste liée à celle-ci
+        game_id = self.current_game_id
         try:
             model_name = self.model_x_input.value if self.current_player == "X" else self.model_o_input.value
             
-            # Convertir la grille pour le backend
-            backend_grid = [[" " if cell == "" else cell for cell in row] for row in self.grid]
-            
-            # Appeler le backend pour jouer le coup
-            resp = requests.post(f"{API_URL}/api/game/move", json={
-                "game_id": self.current_game_id,
-                "grid": backend_grid,
-                "current_player": self.current_player,
+            # Le backend détient la grille : on envoie seulement l'identifiant de partie
+            resp = await self.http.post("/api/game/move", json={
+                "game_id": game_id,
                 "model_name": model_name
             })
-            
-            game_data = resp.json()
-            
-            # Mettre à jour depuis le backend
-            for r in range(ROWS):
-                for c in range(COLS):
-                    self.grid[r][c] = game_data["grid"][r][c]
-            
-            self.current_player = game_data["current_player"]
-            
-            # Gestion du gagnant
-            if game_data.get("winner"):
-                winner = game_data["winner"]
-                self.scores[winner] += 1
-                logger.info(f"Le joueur {winner} a gagné la partie {self.current_game_id}")
-                ui.notify(f"Le joueur {winner} a gagné !", color="positive")
-                if self.auto_mode: 
-                    self.toggle_auto_mode()
-            
-            self.update_display()
+            resp.raise_for_status()
+            # handle_event ignore le coup si la partie affichée a changé entre-temps
+            self.handle_event({**resp.json(), "type": "move", "game_id": game_id})
             
         except Exception as e:
             logger.error(f"Erreur lors du jeu : {e}")
@@ -169,33 +256,179 @@ class TicTacToeApp:
         self.moves_x_label.set_text(f"Coups joués: {self.move_x}")
         self.moves_o_label.set_text(f"Coups joués: {self.move_y}")
         
+        # Seules les cases modifiées depuis le dernier affichage sont envoyées au navigateur
         for r in range(ROWS):
             for c in range(COLS):
                 cell = self.grid[r][c]
+                if cell == self.rendered[r][c]:
+                    continue
                 cell_widget = self.cells[r][c]
                 if cell_widget is not None:
-                    if cell == "X": 
-                        color, bg, text = "white", "red", "X"
-                    elif cell == "O": 
-                        color, bg, text = "white", "blue", "O"
-                    else: 
-                        color, bg, text = "black", "#DEDBD2", "-"
-                    
+                    text, bg, color = CELL_STYLES.get(cell, CELL_STYLES[" "])
                     cell_widget.set_text(text)
                     cell_widget.style(f"background-color: {bg}; color: {color}")
+                self.rendered[r][c] = cell
 
-    def toggle_auto_mode(self):
-        self.auto_mode = not self.auto_mode
-        if self.auto_mode:
+    async def toggle_auto_mode(self):
+        """Le backend enchaîne les coups ; l'interface ne fait que les afficher"""
+        if not self.current_game_id:
+            ui.notify("Démarrez d'abord une partie", color="warning")
+            return
+        enabled = not self.auto_mode
+        try:
+            resp = await self.http.post(f"/api/game/{self.current_game_id}/auto", json={
+                "enabled": enabled,
+                "model_x": self.model_x_input.value,
+                "model_o": self.model_o_input.value
+            })
+            resp.raise_for_status()
+            self.set_auto_button(enabled)
+        except Exception as e:
+            logger.error(f"Erreur mode auto : {e}")
+            ui.notify(f"Erreur: {e}", color="negative")
+
+    def set_auto_button(self, enabled: bool):
+        self.auto_mode = enabled
+        if enabled:
             self.auto_button.text = "Arrêter Auto"
             self.auto_button.style("background-color: #E74C3C;")
-            self.auto_timer = ui.timer(2.0, self.make_move)
         else:
             self.auto_button.text = "Mode Auto"
             self.auto_button.style("background-color: #3498DB;")
-            if self.auto_timer: 
-                self.auto_timer.cancel()
+
+    async def close(self):
+        if self.events_task:
+            self.events_task.cancel()
+        await self.http.aclose()
+
+class SpectatorDashboard:
+    """Toutes les parties en cours sur une page, alimentées par un seul flux WebSocket
+
+    Les événements reçus ne font que mettre à jour l'état ; l'affichage est
+    rafraîchi au plus toutes les DASHBOARD_REFRESH secondes, et seulement pour
+    les parties modifiées. Chaque plateau est un unique élément HTML.
+    """
+
+    def __init__(self):
+        self.games: Dict[str, Dict[str, Any]] = {}
+        self.boards: Dict[str, ui.html] = {}
+        self.dirty: Set[str] = set()
+        self.events_task: Optional[asyncio.Task] = None
+
+    def setup_ui(self):
+        ui.add_css("""
+            .mini-board { display: grid; gap: 1px; background: #4A5759; padding: 1px; }
+            .mini-board span { width: 10px; height: 10px; }
+        """)
+        with ui.row().style("width: 100%; justify-content: center; gap: 16px; align-items: center;"):
+            ui.label("Parties en cours").style("font-size: 28px; font-weight: bold;")
+            self.count_label = ui.label("0 partie").style("font-size: 16px;")
+        self.container = ui.row().style("width: 100%; justify-content: center; gap: 12px; flex-wrap: wrap;")
+        ui.timer(DASHBOARD_REFRESH, self.render)
+        self.events_task = background_tasks.create(self.listen_events())
+
+    async def listen_events(self):
+        """Suivre le flux multiplexé ; à la reconnexion l'instantané resynchronise tout"""
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                async with websockets.connect(f"{WS_URL}/ws/games") as ws:
+                    delay = RECONNECT_DELAY
+                    async for message in ws:
+                        for event in json.loads(message)["events"]:
+                            self.handle_event(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Flux des parties interrompu: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def handle_event(self, event: Dict[str, Any]):
+        game_id = event["game_id"]
+        game = self.games.get(game_id)
+        if event["type"] in ("state", "start") or game is None:
+            game = self.games[game_id] = {
+                "grid": [list(row) for row in event.get("grid") or [[" "] * COLS for _ in range(ROWS)]],
+                # Modèle encore inconnu (None) tant que le joueur n'a pas joué
+                "model_x": event.get("model_x") or "?",
+                "model_o": event.get("model_o") or "?",
+                "tournament_id": event.get("tournament_id"),
+                "move_count": event.get("move_count", 0),
+                "winner": None,
+                "finished_at": None
+            }
+        if event["type"] == "move":
+            game["model_x"] = event.get("model_x") or game["model_x"]
+            game["model_o"] = event.get("model_o") or game["model_o"]
+            move = event["move"]
+            game["grid"][move["row"]][move["col"]] = move["player"]
+            game["move_count"] = event["move_count"]
+            game["winner"] = event.get("winner")
+        if event.get("game_over") and game["finished_at"] is None:
+            game["finished_at"] = time.time()
+        self.dirty.add(game_id)
+
+    def render(self):
+        now = time.time()
+        for game_id, game in list(self.games.items()):
+            if game["finished_at"] and now - game["finished_at"] > DASHBOARD_FINISHED_TTL:
+                del self.games[game_id]
+                self.dirty.discard(game_id)
+                board = self.boards.pop(game_id, None)
+                if board is not None:
+                    board.delete()
+
+        for game_id in self.dirty:
+            game = self.games.get(game_id)
+            if game is None:
+                continue
+            board = self.boards.get(game_id)
+            if board is None:
+                with self.container:
+                    board = self.boards[game_id] = ui.html("", sanitize=False)
+            board.set_content(self.board_html(game))
+        self.dirty.clear()
+        running = sum(1 for game in self.games.values() if not game["finished_at"])
+        self.count_label.set_text(f"{running} partie{'s' if running > 1 else ''}")
+
+    @staticmethod
+    def board_html(game: Dict[str, Any]) -> str:
+        cells = "".join(
+            f'<span style="background: {CELL_STYLES.get(cell, CELL_STYLES[" "])[1]}"></span>'
+            for row in game["grid"] for cell in row
+        )
+        if game["finished_at"]:
+            status = f"Gagnant : {game['winner']}" if game["winner"] else "Match nul"
+        else:
+            status = f"Coup {game['move_count']}"
+        return (
+            f'<div style="font-size: 11px; padding: 6px; border-radius: 6px; background: white; '
+            f'box-shadow: 1px 1px 5px rgba(0,0,0,0.2);">'
+            f'<div style="color: red;">X : {html.escape(game["model_x"])}</div>'
+            f'<div style="color: blue;">O : {html.escape(game["model_o"])}</div>'
+            f'<div class="mini-board" style="grid-template-columns: repeat({len(game["grid"][0])}, 10px);">{cells}</div>'
+            f'<div>{status}</div></div>'
+        )
+
+    async def close(self):
+        if self.events_task:
+            self.events_task.cancel()
+
+@ui.page("/")
+async def index():
+    game_app = TicTacToeApp()
+    # Récupérer les modèles avant de construire l'UI
+    await game_app.fetch_models()
+    game_app.setup_ui()
+    ui.context.client.on_delete(game_app.close)
+
+@ui.page("/dashboard")
+def dashboard():
+    spectator = SpectatorDashboard()
+    spectator.setup_ui()
+    ui.context.client.on_delete(spectator.close)
 
 if __name__ in {"__main__", "__mp_main__"}:
-    app = TicTacToeApp()
-    ui.run(reconnect_timeout=60)
+    # Pas de surveillance des fichiers en production
+    ui.run(reconnect_timeout=60, reload=os.getenv("APP_ENV") != "production")
@@ -1,39 +1,147 @@
+import argparse
+import os
+import signal
 import subprocess
 import sys
 import time
 import logging
+import urllib.request
 from pathlib import Path
+from typing import Dict, List, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ROOT = Path(__file__).parent
+# Redémarrages autorisés par processus dans la fenêtre RESTART_WINDOW (secondes)
+MAX_RESTARTS = 5
+RESTART_WINDOW = 60.0
+
+class Service:
+    """Processus enfant supervisé : démarrage, sonde de disponibilité, redémarrage"""
+
+    def __init__(self, name: str, command: List[str], cwd: Path, env: Dict[str, str], ready_url: Optional[str] = None):
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.env = env
+        self.ready_url = ready_url
+        self.process: Optional[subprocess.Popen] = None
+        self.restarts: List[float] = []
+
+    def start(self):
+        logger.info(f"Lancement du {self.name}...")
+        self.process = subprocess.Popen(self.command, cwd=self.cwd, env=self.env)
+
+    def wait_ready(self, timeout: float = 30.0) -> bool:
+        """Interroger ready_url jusqu'à une réponse 200 (au lieu d'une attente fixe)"""
+        if not self.ready_url:
+            return True
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process and self.process.poll() is not None:
+                return False
+            try:
+                with urllib.request.urlopen(self.ready_url, timeout=1.0) as response:
+                    if response.status == 200:
+                        return True
+            except OSError:
+                pass
+            time.sleep(0.1)
+        return False
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def restart(self) -> bool:
+        """Relancer le processus ; False si trop de redémarrages récents"""
+        now = time.monotonic()
+        self.restarts = [t for t in self.restarts if now - t < RESTART_WINDOW] + [now]
+        if len(self.restarts) > MAX_RESTARTS:
+            logger.error(f"{self.name} redémarré {MAX_RESTARTS} fois en {RESTART_WINDOW:.0f}s, abandon")
+            return False
+        logger.warning(f"{self.name} arrêté (code {self.process.returncode if self.process else '?'}), redémarrage")
+        time.sleep(min(2 ** (len(self.restarts) - 1) * 0.5, 10.0))
+        self.start()
+        if not self.wait_ready():
+            logger.warning(f"{self.name} pas prêt après redémarrage")
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """Arrêt propre (SIGTERM), puis forcé si le processus ne répond pas"""
+        process = self.process
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"{self.name} ne s'arrête pas, arrêt forcé")
+            process.kill()
+            process.wait()
+
+def build_services(args: argparse.Namespace) -> List[Service]:
+    env = dict(os.environ)
+    backend_command = [sys.executable, "-m", "uvicorn", "api:app", "--host", args.host, "--port", str(args.port)]
+    if args.prod:
+        env["APP_ENV"] = "production"
+        backend_command += ["--workers", str(args.workers)]
+    else:
+        backend_command.append("--reload")
+
+    return [
+        Service("backend FastAPI", backend_command, ROOT / "backend", env, ready_url=f"http://{args.host}:{args.port}/"),
+        Service("frontend NiceGUI", [sys.executable, "app.py"], ROOT / "frontend", env)
+    ]
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
 def main():
-    backend_process = None
-    frontend_process = None
-    
+    parser = argparse.ArgumentParser(description="Lancer le backend et le frontend")
+    parser.add_argument("--prod", action="store_true", default=os.getenv("APP_ENV") == "production",
+                        help="Mode production : sans rechargement automatique")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    # Le flux d'événements (WebSocket, mode auto), les tournois, les coups en cours et le
+    # classement Elo sont propres à chaque processus : un seul worker tant qu'ils ne sont pas partagés
+    if args.workers != 1:
+        parser.error(f"--workers {args.workers} non pris en charge : l'état des parties n'est pas partagé entre workers")
+
+    services = build_services(args)
+    backend, frontend = services
+
+    # SIGTERM (docker stop, systemd) suit le même chemin que Ctrl+C
+    signal.signal(signal.SIGTERM, _interrupt)
+
     try:
-        logger.info("Lancement du backend FastAPI...")
-        backend_dir = Path(__file__).parent / "backend"
-        backend_process = subprocess.Popen(
-            [sys.executable, "-m", "uvicorn", "api:app", "--reload", "--host", "127.0.0.1", "--port", "8000"], 
-            cwd=backend_dir
-        )
-
-        time.sleep(3)
-        
-        logger.info("Lancement du frontend NiceGUI...")
-        frontend_dir = Path(__file__).parent / "frontend"
-        frontend_process = subprocess.Popen([sys.executable, "app.py"], cwd=frontend_dir)
+        start = time.monotonic()
+        backend.start()
+        if not backend.wait_ready():
+            logger.error("Le backend n'a pas démarré")
+            return 1
+        logger.info(f"Backend prêt en {time.monotonic() - start:.1f}s")
 
+        frontend.start()
         logger.info("Application lancée ! http://127.0.0.1:8080")
-        frontend_process.wait()
-        
+
+        # Supervision : relancer un processus qui s'arrête
+        while True:
+            for service in services:
+                if not service.alive() and not service.restart():
+                    return 1
+            time.sleep(0.5)
+
     except KeyboardInterrupt:
         logger.info("\nArrêt...")
-        for process in [backend_process, frontend_process]:
-            if process:
-                process.terminate()
+    finally:
+        # Frontend d'abord : il ne doit plus envoyer de requêtes au backend
+        for service in reversed(services):
+            service.stop()
         logger.info("Application arrêtée")
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Le backend s'exécute depuis backend/ avec des imports à plat (from board import Board)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
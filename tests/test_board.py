@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from board import Board
+from game_engine import GameEngine
+
+def _grid(cells, size=10):
+    grid = [[" "] * size for _ in range(size)]
+    for row, col, player in cells:
+        grid[row][col] = player
+    return grid
+
+def _line(start, step, length, player="X"):
+    (row, col), (dr, dc) = start, step
+    return [(row + i * dr, col + i * dc, player) for i in range(length)]
+
+# Alignements collés aux bords : les décalages ne doivent pas passer d'une ligne à l'autre
+EDGE_LINES = [
+    ((0, 5), (0, 1)),   # horizontal, bord droit
+    ((9, 0), (0, 1)),   # horizontal, dernière ligne
+    ((5, 9), (1, 0)),   # vertical, dernière colonne
+    ((0, 0), (1, 1)),   # diagonale depuis le coin
+    ((5, 5), (1, 1)),   # diagonale jusqu'au coin opposé
+    ((0, 9), (1, -1)),  # anti-diagonale depuis le coin haut droit
+    ((5, 4), (1, -1)),  # anti-diagonale jusqu'au bord gauche
+    ((9, 4), (-1, 1)),  # anti-diagonale montante, bas gauche
+]
+
+@pytest.mark.parametrize("start,step", EDGE_LINES)
+def test_has_won_on_edge_lines(start, step):
+    grid = _grid(_line(start, step, 5))
+    assert Board.from_grid(grid).has_won("X")
+    assert GameEngine().check_winner(grid, "X")
+    assert not Board.from_grid(grid).has_won("O")
+
+@pytest.mark.parametrize("start,step", EDGE_LINES)
+def test_four_is_not_a_win(start, step):
+    grid = _grid(_line(start, step, 4))
+    assert not Board.from_grid(grid).has_won("X")
+    assert not GameEngine().check_winner(grid, "X")
+
+def test_no_wrap_around_rows():
+    # Fin d'une ligne et début de la suivante : 5 cases consécutives en mémoire, pas un alignement
+    grid = _grid([(0, 7, "X"), (0, 8, "X"), (0, 9, "X"), (1, 0, "X"), (1, 1, "X")])
+    assert not Board.from_grid(grid).has_won("X")
+    # Anti-diagonale coupée par le bord gauche
+    grid = _grid([(0, 2, "X"), (1, 1, "X"), (2, 0, "X"), (3, 9, "X"), (4, 8, "X")])
+    assert not Board.from_grid(grid).has_won("X")
+
+def test_has_won_matches_check_winner_on_random_games():
+    engine = GameEngine()
+    rng = random.Random(0)
+    cells = [(r, c) for r in range(10) for c in range(10)]
+    for _ in range(200):
+        board = Board()
+        grid = [[" "] * 10 for _ in range(10)]
+        for n, (row, col) in enumerate(rng.sample(cells, rng.randrange(5, 60))):
+            player = "XO"[n % 2]
+            board = board.play(row, col, player)
+            grid = engine.make_move(grid, row, col, player)
+        for player in "XO":
+            assert board.has_won(player) == engine.check_winner(grid, player)
+        assert board.to_grid() == grid
+        assert board.is_full() == engine.is_grid_full(grid)
+
+def test_play_is_immutable_and_validated():
+    board = Board()
+    after = board.play(3, 4, "X")
+    assert board.is_empty(3, 4) and after.cell(3, 4) == "X"
+    assert after.move_count == 1
+    with pytest.raises(ValueError):
+        after.play(3, 4, "O")
+    with pytest.raises(ValueError):
+        board.play(10, 0, "X")
+    with pytest.raises(ValueError):
+        board.play(0, 0, "Z")
+
+def test_dict_round_trip():
+    board = Board().play(0, 0, "X").play(9, 9, "O")
+    assert Board.from_dict(board.to_dict()) == board
@@ -0,0 +1,53 @@
+import pytest
+
+from move_cache import INVERSES, SYMMETRIES, MoveCache
+
+N = 10
+
+@pytest.mark.parametrize("transform", range(len(SYMMETRIES)))
+def test_inverse_round_trip(transform):
+    inverse = SYMMETRIES[INVERSES[transform]]
+    for r in range(N):
+        for c in range(N):
+            assert inverse(*SYMMETRIES[transform](r, c, N), N) == (r, c)
+
+def _transformed(grid, transform):
+    n = len(grid)
+    cells = [[" "] * n for _ in range(n)]
+    for r, row in enumerate(grid):
+        for c, cell in enumerate(row):
+            tr, tc = SYMMETRIES[transform](r, c, n)
+            cells[tr][tc] = cell
+    return cells
+
+@pytest.mark.parametrize("transform", range(len(SYMMETRIES)))
+def test_move_follows_symmetric_position(transform):
+    grid = [[" "] * N for _ in range(N)]
+    grid[2][3], grid[2][4], grid[6][1] = "X", "O", "X"
+    cache = MoveCache()
+    key, t = cache.key_for(grid, "O", "model", "v1")
+    cache.put(key, t, N, 2, 5)
+
+    # Même position vue sous une rotation ou un miroir : même clé, coup transformé
+    other = _transformed(grid, transform)
+    other_key, other_t = cache.key_for(other, "O", "model", "v1")
+    assert other_key == key
+    assert cache.get(other_key, other_t, N) == SYMMETRIES[transform](2, 5, N)
+
+def test_key_depends_on_player_model_and_prompt():
+    grid = [[" "] * N for _ in range(N)]
+    grid[4][4] = "X"
+    cache = MoveCache()
+    key, _ = cache.key_for(grid, "O", "model", "v1")
+    assert cache.key_for(grid, "X", "model", "v1")[0] != key
+    assert cache.key_for(grid, "O", "other", "v1")[0] != key
+    assert cache.key_for(grid, "O", "model", "v2")[0] != key
+
+def test_lru_eviction():
+    cache = MoveCache(max_size=2)
+    cache.put("a", 0, N, 0, 0)
+    cache.put("b", 0, N, 0, 1)
+    assert cache.get("a", 0, N) == (0, 0)
+    cache.put("c", 0, N, 0, 2)
+    assert cache.get("b", 0, N) is None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+
+from ollama_scheduler import OllamaScheduler
+
+class FakeHTTP:
+    """Client Ollama factice : enregistre l'ordre des modèles appelés"""
+
+    def __init__(self, delay=0.01, loaded=(), gate=None):
+        self.delay = delay
+        self.gate = gate
+        self.loaded = list(loaded)
+        self.calls = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    async def post(self, path, json):
+        self.calls.append(json["model"])
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            if self.gate is not None:
+                await self.gate
+            await asyncio.sleep(self.delay)
+        finally:
+            self.concurrent -= 1
+        return httpx.Response(200, json={"response": "{}", "load_duration": 0},
+                              request=httpx.Request("POST", path))
+
+    async def get(self, path):
+        return httpx.Response(200, json={"models": [{"name": name} for name in self.loaded]},
+                              request=httpx.Request("GET", path))
+
+async def _run(scheduler, models, timeout=None):
+    results = await asyncio.gather(*(scheduler.generate(model, {"prompt": ""}, timeout) for model in models),
+                                   return_exceptions=True)
+    await scheduler.aclose()
+    return results
+
+def test_requests_are_grouped_by_model():
+    http = FakeHTTP()
+    scheduler = OllamaScheduler(http, num_parallel=1, max_batch=32, max_wait=60)
+    asyncio.run(_run(scheduler, ["a", "b", "a", "b", "a"]))
+    assert http.calls == ["a", "a", "a", "b", "b"]
+    assert scheduler.stats()["swaps"] == 1
+
+def test_max_batch_lets_other_models_through():
+    http = FakeHTTP()
+    scheduler = OllamaScheduler(http, num_parallel=1, max_batch=2, max_wait=60)
+    asyncio.run(_run(scheduler, ["a", "a", "a", "a", "b"]))
+    assert http.calls == ["a", "a", "b", "a", "a"]
+
+def test_loaded_model_is_preferred():
+    async def scenario():
+        http = FakeHTTP(loaded=["b"])
+        scheduler = OllamaScheduler(http, num_parallel=1, max_wait=60)
+        await scheduler.loaded_models(max_age=0)
+        await _run(scheduler, ["a", "c", "c", "b"])
+        return http.calls
+    # « b » est déjà en mémoire, puis le modèle qui a le plus de demandes
+    assert asyncio.run(scenario()) == ["b", "c", "c", "a"]
+
+def test_starved_model_is_served_after_max_wait():
+    async def scenario():
+        http = FakeHTTP(loaded=["b"])
+        scheduler = OllamaScheduler(http, num_parallel=1, max_wait=0)
+        await scheduler.loaded_models(max_age=0)
+        await _run(scheduler, ["a", "b", "b"])
+        return http.calls
+    assert asyncio.run(scenario()) == ["a", "b", "b"]
+
+def test_no_concurrent_models():
+    http = FakeHTTP()
+    scheduler = OllamaScheduler(http, num_parallel=4, max_wait=60)
+    asyncio.run(_run(scheduler, ["a", "b"] * 4))
+    assert http.calls == ["a"] * 4 + ["b"] * 4
+    assert http.max_concurrent == 4
+
+def test_resident_models_are_served_in_arrival_order():
+    async def scenario():
+        http = FakeHTTP(loaded=["a", "b"])
+        scheduler = OllamaScheduler(http, num_parallel=4, max_wait=60)
+        await scheduler.loaded_models(max_age=0)
+        await _run(scheduler, ["a", "b"] * 4)
+        return http, scheduler.stats()
+    http, stats = asyncio.run(scenario())
+    # Déjà en mémoire tous les deux : pas de regroupement ni d'attente entre modèles
+    assert http.calls == ["a", "b"] * 4
+    assert http.max_concurrent == 4
+    assert stats["swaps"] == 0
+
+def test_resident_model_does_not_wait_for_cold_load_to_drain():
+    async def scenario():
+        gate = asyncio.get_running_loop().create_future()
+        http = FakeHTTP(delay=0, loaded=["b"], gate=gate)
+        scheduler = OllamaScheduler(http, num_parallel=2, max_wait=60)
+        await scheduler.loaded_models(max_age=0)
+        first = asyncio.ensure_future(scheduler.generate("b", {"prompt": ""}))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(scheduler.generate("b", {"prompt": ""}))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        # Les deux requêtes sont parties alors que la première n'est pas terminée
+        calls = list(http.calls)
+        gate.set_result(None)
+        await asyncio.gather(first, second)
+        await scheduler.aclose()
+        return calls
+    assert asyncio.run(scenario()) == ["b", "b"]
+
+def test_timeout_covers_queue_wait():
+    async def scenario():
+        # La première requête reste en cours tant que le test ne libère pas gate
+        gate = asyncio.get_running_loop().create_future()
+        http = FakeHTTP(delay=0, gate=gate)
+        scheduler = OllamaScheduler(http, num_parallel=1, max_wait=60)
+        first = asyncio.ensure_future(scheduler.generate("a", {"prompt": ""}))
+        await asyncio.sleep(0)
+        # La seconde n'a pas quitté la file quand son délai expire
+        try:
+            await scheduler.generate("a", {"prompt": ""}, timeout=0.01)
+            timed_out = False
+        except asyncio.TimeoutError:
+            timed_out = True
+        gate.set_result(None)
+        response = await first
+        for _ in range(5):
+            await asyncio.sleep(0)
+        stats = scheduler.stats()
+        await scheduler.aclose()
+        return timed_out, response, http.calls, stats
+    timed_out, response, calls, stats = asyncio.run(scenario())
+    assert timed_out
+    assert isinstance(response, httpx.Response)
+    # La demande abandonnée n'est jamais envoyée
+    assert calls == ["a"]
+    assert stats["cancelled"] == 1
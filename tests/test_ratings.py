@@ -0,0 +1,34 @@
+import threading
+
+from ratings import RatingService
+
+GAME = {"model_x": "a", "model_o": "b", "winner": "X"}
+
+def test_concurrent_services_do_not_lose_updates(tmp_path):
+    # Deux services sur le même fichier : comme deux processus qui journalisent des parties
+    path = str(tmp_path / "ratings.db")
+    services = [RatingService(path), RatingService(path)]
+    threads = [threading.Thread(target=lambda s=s: [s.update([GAME]) for _ in range(50)]) for s in services]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    board = {row["model"]: row for row in services[0].leaderboard()}
+    assert board["a"]["games"] == board["b"]["games"] == 100
+    assert board["a"]["wins"] == 100
+    assert board["a"]["rating"] + board["b"]["rating"] == 3000
+    for service in services:
+        service.close()
+
+def test_rebuild_replaces_ratings(tmp_path):
+    service = RatingService(str(tmp_path / "ratings.db"))
+    service.update([GAME, {"model_x": "c", "model_o": "b", "winner": None}])
+    assert service.rebuild([GAME]) == 1
+    assert [row["model"] for row in service.leaderboard()] == ["a", "b"]
+    assert service.leaderboard()[0]["rating"] == 1516.0
+
+def test_games_without_two_models_are_ignored(tmp_path):
+    service = RatingService(str(tmp_path / "ratings.db"))
+    service.update([{"model_x": "a", "model_o": "a", "winner": "X"}, {"model_x": "a", "winner": "O"}])
+    assert service.leaderboard() == []
@@ -0,0 +1,34 @@
+import pytest
+
+from tactics import TacticalEngine
+
+def _grid(cells, size=10):
+    grid = [[" "] * size for _ in range(size)]
+    for row, col, player in cells:
+        grid[row][col] = player
+    return grid
+
+@pytest.mark.parametrize("depth", [0, 2])
+def test_blocks_open_four(depth):
+    # Quatre ouvert de X en (3, 2..5) : O doit occuper une des deux extrémités
+    grid = _grid([(3, c, "X") for c in range(2, 6)] + [(6, 6, "O"), (7, 7, "O"), (8, 1, "O")])
+    assert TacticalEngine(depth=depth).best_move(grid, "O") in {(3, 1), (3, 6)}
+
+@pytest.mark.parametrize("depth", [0, 2])
+def test_blocks_closed_four_on_diagonal(depth):
+    # Diagonale X fermée par O en (0, 0) : seule (5, 5) empêche la victoire
+    grid = _grid([(i, i, "X") for i in range(1, 5)] + [(0, 0, "O"), (8, 2, "O"), (9, 9, "O")])
+    assert TacticalEngine(depth=depth).best_move(grid, "O") == (5, 5)
+
+def test_prefers_winning_over_blocking():
+    grid = _grid([(3, c, "X") for c in range(2, 6)] + [(7, c, "O") for c in range(1, 5)])
+    assert TacticalEngine().best_move(grid, "O") in {(7, 0), (7, 5)}
+
+def test_blocks_open_three():
+    grid = _grid([(5, 3, "X"), (5, 4, "X"), (5, 5, "X"), (0, 9, "O"), (9, 0, "O")])
+    assert TacticalEngine().best_move(grid, "O") in {(5, 2), (5, 6)}
+
+def test_empty_and_full_grids():
+    engine = TacticalEngine()
+    assert engine.best_move(_grid([]), "X") == (5, 5)
+    assert engine.best_move([["X", "O"], ["O", "X"]], "X") is None